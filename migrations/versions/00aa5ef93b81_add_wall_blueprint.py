@@ -7,8 +7,6 @@ Create Date: 2024-04-24 17:25:40.974032
 """
 import sqlalchemy as sa
 from alembic import op
-from sqlalchemy import text
-from sqlalchemy.orm import Session
 
 # revision identifiers, used by Alembic.
 revision = '00aa5ef93b81'
@@ -16,14 +14,23 @@ down_revision = '7b87cc5483ea'
 branch_labels = None
 depends_on = None
 
+# Lightweight handle on the blueprint table, only listing the columns this revision touches
+blueprint_table = sa.table('blueprint',
+                           sa.column('id', sa.SmallInteger),
+                           sa.column('name', sa.String),
+                           sa.column('description', sa.String),
+                           sa.column('cost', sa.Integer))
+
 
 def upgrade():
 
     # Just a bit of data migration
     # Populate the db with new blueprints
     print("INFO Inserting Wall blueprint")
-    # We need to do this with raw SQL as SQLAlchemy already knows there's a new column, but the DB doesn't have that column yet (as it's in a later migration)
-    op.execute("INSERT INTO blueprint (id, name, description, cost) VALUES (8, 'Wall', 'A wall to keep enemies from entering your base', 500)")
+    # We can't use the ORM model here as SQLAlchemy may already know about columns the DB doesn't have yet (as they're in a later migration)
+    op.execute(blueprint_table.insert().values([
+        {'id': 8, 'name': 'Wall', 'description': 'A wall to keep enemies from entering your base', 'cost': 500}
+    ]))
 
 def downgrade():
     op.execute("DELETE FROM blueprint WHERE id = 8")
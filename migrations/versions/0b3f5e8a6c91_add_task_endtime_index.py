@@ -0,0 +1,24 @@
+"""add task endtime index
+
+Revision ID: 0b3f5e8a6c91
+Revises: f19d4c7be250
+Create Date: 2024-06-04 13:40:26.771904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b3f5e8a6c91'
+down_revision = 'f19d4c7be250'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_task_island_endtime', 'task', ['island_id', 'endtime'])
+
+
+def downgrade():
+    op.drop_index('ix_task_island_endtime', table_name='task')
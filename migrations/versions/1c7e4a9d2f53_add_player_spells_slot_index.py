@@ -0,0 +1,24 @@
+"""add player spells slot index
+
+Revision ID: 1c7e4a9d2f53
+Revises: 0b3f5e8a6c91
+Create Date: 2024-06-04 15:02:11.408236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c7e4a9d2f53'
+down_revision = '0b3f5e8a6c91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_player_spells_player_slot', 'player_spells', ['player_id', 'slot'])
+
+
+def downgrade():
+    op.drop_index('ix_player_spells_player_slot', table_name='player_spells')
@@ -15,6 +15,17 @@ down_revision = 'dc57db68b859'
 branch_labels = None
 depends_on = None
 
+# The static set of spells, seeded right after the table is created (see also 4589aa4f65e1)
+SPELLS = [
+    {"id": 0, "name": "BuildSpell"},
+    {"id": 1, "name": "Fireball"},
+    {"id": 2, "name": "IceWall"},
+    {"id": 3, "name": "Zap"},
+    {"id": 4, "name": "ThunderCloud"},
+    {"id": 5, "name": "Shield"},
+    {"id": 6, "name": "Heal"}
+]
+
 
 def upgrade():
     # ### commands auto generated by Alembic - please adjust! ###
@@ -26,12 +37,16 @@ def upgrade():
     op.create_table('player_spells',
     sa.Column('player_id', sa.Integer(), nullable=False),
     sa.Column('spell_id', sa.Integer(), nullable=False),
-    sa.ForeignKeyConstraint(['player_id'], ['player.user_profile_id'], ),
-    sa.ForeignKeyConstraint(['spell_id'], ['spell.id'], ),
+    sa.ForeignKeyConstraint(['player_id'], ['player.user_profile_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['spell_id'], ['spell.id'], ondelete='CASCADE'),
     sa.PrimaryKeyConstraint('player_id', 'spell_id')
     )
     # ### end Alembic commands ###
 
+    # Seed the spells at creation time, so the later data migration doesn't have to wipe & refill the table
+    spell_table = sa.table('spell', sa.column('id', sa.Integer), sa.column('name', sa.String))
+    op.bulk_insert(spell_table, SPELLS)
+
 
 def downgrade():
     # ### commands auto generated by Alembic - please adjust! ###
@@ -0,0 +1,28 @@
+"""placeable task fk set null
+
+Revision ID: 2d9a6f3b8e14
+Revises: 1c7e4a9d2f53
+Create Date: 2024-06-05 10:21:37.615092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d9a6f3b8e14'
+down_revision = '1c7e4a9d2f53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('placeable', schema=None) as batch_op:
+        batch_op.drop_constraint('placeable_task_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('placeable_task_id_fkey', 'task', ['task_id'], ['id'], ondelete='set null')
+
+
+def downgrade():
+    with op.batch_alter_table('placeable', schema=None) as batch_op:
+        batch_op.drop_constraint('placeable_task_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('placeable_task_id_fkey', 'task', ['task_id'], ['id'])
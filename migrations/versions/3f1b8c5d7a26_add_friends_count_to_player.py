@@ -0,0 +1,30 @@
+"""add friends_count to player
+
+Revision ID: 3f1b8c5d7a26
+Revises: 2d9a6f3b8e14
+Create Date: 2024-06-05 11:48:03.127764
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1b8c5d7a26'
+down_revision = '2d9a6f3b8e14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('player', sa.Column('friends_count', sa.Integer(), nullable=False, server_default='0'))
+    # Populate the denormalized count of the existing friendships
+    op.execute('UPDATE player SET friends_count = counts.n '
+               'FROM (SELECT player_id, count(*) AS n FROM friends_association GROUP BY player_id) AS counts '
+               'WHERE counts.player_id = player.user_profile_id')
+    op.create_check_constraint('ck_player_friends_count', 'player', 'friends_count >= 0')
+
+
+def downgrade():
+    op.drop_constraint('ck_player_friends_count', 'player', type_='check')
+    op.drop_column('player', 'friends_count')
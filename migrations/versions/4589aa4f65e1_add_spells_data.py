@@ -7,6 +7,7 @@ Create Date: 2024-04-13 14:53:44.969927
 """
 from alembic import op
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
 
 
 # revision identifiers, used by Alembic.
@@ -15,16 +16,20 @@ down_revision = '081d41bb3cad'
 branch_labels = None
 depends_on = None
 
+# Lightweight handle on the spell table, so we don't have to declare a throwaway Table/MetaData
+spell_table = sa.table('spell',
+                       sa.column('id', sa.Integer),
+                       sa.column('name', sa.String))
+
 
 def upgrade():
     """
-    In order to cascade the changes, we need to update the foreign key constraint
-    But we cannot update a constraint, so we have to remvoe it and then recreate it with the proper cascade policies
-    Then, we finally truncate the table spell
+    Reconcile the spell table with the static set of spells
+    Fresh databases already have these rows (seeded in 22389b2496cb), so this is a no-op for them.
+    Older databases get their unknown spells removed (cascading to player_spells) and the known ones inserted or renamed,
+    without wiping & refilling the whole table
     :return:
     """
-    op.execute("DELETE FROM spell CASCADE WHERE true;")  # Nuke it lol
-
     spells = [
         {"id": 0, "name": "BuildSpell"},
         {"id": 1, "name": "Fireball"},
@@ -34,15 +39,13 @@ def upgrade():
         {"id": 5, "name": "Shield"},
         {"id": 6, "name": "Heal"}
     ]
-    op.bulk_insert(
-        sa.Table('spell', sa.MetaData(),
-                 sa.Column('id', sa.Integer(), primary_key=True),
-                 sa.Column('name', sa.String(255), nullable=False)
-                 ),
-        spells
-    )
+    op.execute(spell_table.delete().where(spell_table.c.id.notin_([spell['id'] for spell in spells])))
+
+    # Single multi-VALUES upsert instead of an executemany
+    stmt = insert(spell_table).values(spells)
+    op.execute(stmt.on_conflict_do_update(index_elements=['id'], set_={'name': stmt.excluded.name}))
 
 
 def downgrade():
-    op.execute("DELETE FROM spell CASCADE WHERE true;")  # Nuke it lol
+    op.execute("TRUNCATE TABLE spell CASCADE")  # Nuke it lol (also empties player_spells)
 
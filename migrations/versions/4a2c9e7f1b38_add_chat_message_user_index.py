@@ -0,0 +1,24 @@
+"""add chat message user index
+
+Revision ID: 4a2c9e7f1b38
+Revises: 3f1b8c5d7a26
+Create Date: 2024-06-06 09:34:52.840117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a2c9e7f1b38'
+down_revision = '3f1b8c5d7a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_chat_message_user_id', 'chat_message', ['user_id', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_chat_message_user_id', table_name='chat_message')
@@ -20,25 +20,21 @@ depends_on = None
 
 def upgrade():
     # ### commands auto generated by Alembic - please adjust! ###
-    with op.batch_alter_table('gem', schema=None) as batch_op:
-        batch_op.drop_constraint('gem_mine_id_fkey', type_='foreignkey')
-        batch_op.drop_column('mine_id')
+    op.drop_constraint('gem_mine_id_fkey', 'gem', type_='foreignkey')
+    op.drop_column('gem', 'mine_id')
 
-    with op.batch_alter_table('mine_building', schema=None) as batch_op:
-        batch_op.add_column(sa.Column('last_collected', sa.DateTime(), nullable=False, server_default=str(datetime.datetime(1970, 1, 1, 0, 0))))
-        batch_op.drop_column('mined_amount')
+    op.add_column('mine_building', sa.Column('last_collected', sa.DateTime(), nullable=False, server_default=str(datetime.datetime(1970, 1, 1, 0, 0))))
+    op.drop_column('mine_building', 'mined_amount')
 
     # ### end Alembic commands ###
 
 
 def downgrade():
     # ### commands auto generated by Alembic - please adjust! ###
-    with op.batch_alter_table('mine_building', schema=None) as batch_op:
-        batch_op.add_column(sa.Column('mined_amount', sa.BIGINT(), autoincrement=False, nullable=False, server_default='0'))
-        batch_op.drop_column('last_collected')
+    op.add_column('mine_building', sa.Column('mined_amount', sa.BIGINT(), autoincrement=False, nullable=False, server_default='0'))
+    op.drop_column('mine_building', 'last_collected')
 
-    with op.batch_alter_table('gem', schema=None) as batch_op:
-        batch_op.add_column(sa.Column('mine_id', sa.BIGINT(), autoincrement=False, nullable=True))
-        batch_op.create_foreign_key('gem_mine_id_fkey', 'mine_building', ['mine_id'], ['placeable_id'])
+    op.add_column('gem', sa.Column('mine_id', sa.BIGINT(), autoincrement=False, nullable=True))
+    op.create_foreign_key('gem_mine_id_fkey', 'gem', 'mine_building', ['mine_id'], ['placeable_id'])
 
     # ### end Alembic commands ###
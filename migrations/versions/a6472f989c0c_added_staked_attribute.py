@@ -18,15 +18,14 @@ depends_on = None
 
 def upgrade():
     # ### commands auto generated by Alembic - please adjust! ###
-    with op.batch_alter_table('gem', schema=None) as batch_op:
-        batch_op.add_column(sa.Column('staked', sa.Boolean(), nullable=False, default=False, server_default='false'))
+    # Constant default + NOT NULL in a single ADD COLUMN is a catalog-only change on PG 11+ (no table rewrite)
+    op.execute("ALTER TABLE gem ADD COLUMN staked BOOLEAN NOT NULL DEFAULT false")
 
     # ### end Alembic commands ###
 
 
 def downgrade():
     # ### commands auto generated by Alembic - please adjust! ###
-    with op.batch_alter_table('gem', schema=None) as batch_op:
-        batch_op.drop_column('staked')
+    op.execute("ALTER TABLE gem DROP COLUMN staked")
 
     # ### end Alembic commands ###
@@ -7,7 +7,8 @@ Create Date: 2024-04-03 20:39:07.493918
 """
 from alembic import op
 import sqlalchemy as sa
-from sqlalchemy.orm import Session
+
+from src.model.enums import BlueprintType
 
 # revision identifiers, used by Alembic.
 revision = 'aa156f1b0d9e'
@@ -15,34 +16,27 @@ down_revision = 'e829e9c7177f'
 branch_labels = None
 depends_on = None
 
+# Lightweight handle on the blueprint table, so we don't depend on the (current) ORM model
+blueprint_table = sa.table('blueprint',
+                           sa.column('id', sa.SmallInteger),
+                           sa.column('name', sa.String),
+                           sa.column('description', sa.String),
+                           sa.column('cost', sa.Integer),
+                           sa.column('buildtime', sa.Integer))
+
 
 def upgrade():
     ## This is only a bit of data migration, we add 'tree' and 'bush' as blueprint props to the db
-    session = Session(bind=op.get_bind())
-    from src.model.blueprint import Blueprint
-    from src.model.enums import BlueprintType
     print("INFO Adding props 'Tree' and 'Bush' to db")
-    session.add(Blueprint(id=BlueprintType.TREE.value, name="Tree", description="A tree (there's nothing more to it)", cost=40, buildtime=5))
-    session.add(Blueprint(id=BlueprintType.BUSH.value, name="Bush", description="A bush (there's nothing more to it)", cost=20, buildtime=5))
-    bps = session.query(Blueprint).filter(Blueprint.id == BlueprintType.FUSE_TABLE.value).all()
-    for bp in bps:
-        bp.name = "FusionTable"
-    bps = session.query(Blueprint).filter(Blueprint.id == BlueprintType.WARRIOR_HUT.value).all()
-    for bp in bps:
-        bp.name = "WarriorHut"
-    session.commit()
+    op.bulk_insert(blueprint_table, [
+        {'id': BlueprintType.TREE.value, 'name': "Tree", 'description': "A tree (there's nothing more to it)", 'cost': 40, 'buildtime': 5},
+        {'id': BlueprintType.BUSH.value, 'name': "Bush", 'description': "A bush (there's nothing more to it)", 'cost': 20, 'buildtime': 5}
+    ])
+    op.execute(blueprint_table.update().where(blueprint_table.c.id == BlueprintType.FUSE_TABLE.value).values(name="FusionTable"))
+    op.execute(blueprint_table.update().where(blueprint_table.c.id == BlueprintType.WARRIOR_HUT.value).values(name="WarriorHut"))
 
 def downgrade():
-    session = Session(bind=op.get_bind())
-    from src.model.blueprint import Blueprint
-    from src.model.enums import BlueprintType
     print("INFO Removing props from db")
-    session.query(Blueprint).filter(Blueprint.id == BlueprintType.TREE.value).delete()
-    session.query(Blueprint).filter(Blueprint.id == BlueprintType.BUSH.value).delete()
-    bps = session.query(Blueprint).filter(Blueprint.id == BlueprintType.FUSE_TABLE.value).all()
-    for bp in bps:
-        bp.name = "Fuse Table"
-    bps = session.query(Blueprint).filter(Blueprint.id == BlueprintType.WARRIOR_HUT.value).all()
-    for bp in bps:
-        bp.name = "Warrior Hut"
-    session.commit()
+    op.execute(blueprint_table.delete().where(blueprint_table.c.id.in_([BlueprintType.TREE.value, BlueprintType.BUSH.value])))
+    op.execute(blueprint_table.update().where(blueprint_table.c.id == BlueprintType.FUSE_TABLE.value).values(name="Fuse Table"))
+    op.execute(blueprint_table.update().where(blueprint_table.c.id == BlueprintType.WARRIOR_HUT.value).values(name="Warrior Hut"))
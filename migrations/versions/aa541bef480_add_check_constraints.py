@@ -16,39 +16,62 @@ branch_labels = None
 depends_on = None
 
 
+def add_check_constraints(table: str, constraints: dict) -> None:
+    """
+    Add the given CHECK constraints to a table without blocking it for a full table scan
+    The constraints are first added as NOT VALID (catalog update only, existing rows are not checked),
+    then validated in a second statement which only takes a SHARE UPDATE EXCLUSIVE lock
+    :param table: The name of the table
+    :param constraints: The constraints to add, mapped by name to their CHECK expression
+    :return: None
+    """
+    op.execute(f"ALTER TABLE {table} " +
+               ", ".join(f"ADD CONSTRAINT {name} CHECK ({expr}) NOT VALID" for name, expr in constraints.items()))
+    op.execute(f"ALTER TABLE {table} " +
+               ", ".join(f"VALIDATE CONSTRAINT {name}" for name in constraints))
+
+
 def upgrade():
     # Add check constraints to the building table
-    op.create_check_constraint('ck_building_level', 'building', 'level >= 0')
+    add_check_constraints('building', {'ck_building_level': 'level >= 0'})
 
     # Add check constraints to the placeable table
-    op.create_check_constraint('ck_placeable_xpos', 'placeable', 'xpos >= -7 AND xpos <= 7')
-    op.create_check_constraint('ck_placeable_zpos', 'placeable', 'zpos >= -7 AND zpos <= 7')
-    op.create_check_constraint('ck_placeable_rotation', 'placeable', 'rotation >= 0 AND rotation <= 3')
+    add_check_constraints('placeable', {
+        'ck_placeable_xpos': 'xpos >= -7 AND xpos <= 7',
+        'ck_placeable_zpos': 'zpos >= -7 AND zpos <= 7',
+        'ck_placeable_rotation': 'rotation >= 0 AND rotation <= 3'
+    })
 
     # Add check constraints to the blueprint table
-    op.create_check_constraint('ck_blueprint_cost', 'blueprint', 'cost >= 0')
-    op.create_check_constraint('ck_blueprint_buildtime', 'blueprint', 'buildtime >= 0')
+    add_check_constraints('blueprint', {
+        'ck_blueprint_cost': 'cost >= 0',
+        'ck_blueprint_buildtime': 'buildtime >= 0'
+    })
 
     # Add check constraints to the building_upgrade_task table
-    op.create_check_constraint('ck_building_upgrade_task_used_crystals', 'building_upgrade_task', 'used_crystals >= 0')
-    op.create_check_constraint('ck_building_upgrade_task_used_to_level', 'building_upgrade_task', 'to_level >= 0')
+    add_check_constraints('building_upgrade_task', {
+        'ck_building_upgrade_task_used_crystals': 'used_crystals >= 0',
+        'ck_building_upgrade_task_used_to_level': 'to_level >= 0'
+    })
 
     # Add check constraints to the entity table
-    op.create_check_constraint('ck_entity_level', 'entity', 'level >= 0')
+    add_check_constraints('entity', {'ck_entity_level': 'level >= 0'})
 
     # Add check constraints to the gem_attribute_association table
-    op.create_check_constraint('ck_gem_attribute_association_multiplier', 'gem_attribute_association', 'multiplier >= 0')
+    add_check_constraints('gem_attribute_association', {'ck_gem_attribute_association_multiplier': 'multiplier >= 0'})
 
     # Add check constraints to the mine_building table
-    op.create_check_constraint('ck_mine_building_mined_amount', 'mine_building', 'mined_amount >= 0')
+    add_check_constraints('mine_building', {'ck_mine_building_mined_amount': 'mined_amount >= 0'})
 
     # Add check constraints to the player table
-    op.create_check_constraint('ck_player_crystals', 'player', 'crystals >= 0')
-    op.create_check_constraint('ck_player_mana', 'player', 'mana >= 0 AND mana <= 1000')
-    op.create_check_constraint('ck_player_xp', 'player', 'xp >= 0')
+    add_check_constraints('player', {
+        'ck_player_crystals': 'crystals >= 0',
+        'ck_player_mana': 'mana >= 0 AND mana <= 1000',
+        'ck_player_xp': 'xp >= 0'
+    })
 
     # Add check constraints to the user_settings table
-    op.create_check_constraint('ck_user_settings_audio_volume', 'user_settings', 'audio_volume >= 0 AND audio_volume <= 100')
+    add_check_constraints('user_settings', {'ck_user_settings_audio_volume': 'audio_volume >= 0 AND audio_volume <= 100'})
 
 
 def downgrade():
@@ -56,17 +79,20 @@ def downgrade():
     op.drop_constraint('ck_building_level', 'building')
 
     # Remove check constraints from the placeable table
-    op.drop_constraint('ck_placeable_xpos', 'placeable')
-    op.drop_constraint('ck_placeable_zpos', 'placeable')
-    op.drop_constraint('ck_placeable_rotation', 'placeable')
+    op.execute("ALTER TABLE placeable "
+               "DROP CONSTRAINT ck_placeable_xpos, "
+               "DROP CONSTRAINT ck_placeable_zpos, "
+               "DROP CONSTRAINT ck_placeable_rotation")
 
     # Remove check constraints from the blueprint table
-    op.drop_constraint('ck_blueprint_cost', 'blueprint')
-    op.drop_constraint('ck_blueprint_buildtime', 'blueprint')
+    op.execute("ALTER TABLE blueprint "
+               "DROP CONSTRAINT ck_blueprint_cost, "
+               "DROP CONSTRAINT ck_blueprint_buildtime")
 
     # Remove check constraints from the building_upgrade_task table
-    op.drop_constraint('ck_building_upgrade_task_used_crystals', 'building_upgrade_task')
-    op.drop_constraint('ck_building_upgrade_task_used_to_level', 'building_upgrade_task')
+    op.execute("ALTER TABLE building_upgrade_task "
+               "DROP CONSTRAINT ck_building_upgrade_task_used_crystals, "
+               "DROP CONSTRAINT ck_building_upgrade_task_used_to_level")
 
     # Remove check constraints from the entity table
     op.drop_constraint('ck_entity_level', 'entity')
@@ -78,9 +104,10 @@ def downgrade():
     op.drop_constraint('ck_mine_building_mined_amount', 'mine_building')
 
     # Remove check constraints from the player table
-    op.drop_constraint('ck_player_crystals', 'player')
-    op.drop_constraint('ck_player_mana', 'player')
-    op.drop_constraint('ck_player_xp', 'player')
+    op.execute("ALTER TABLE player "
+               "DROP CONSTRAINT ck_player_crystals, "
+               "DROP CONSTRAINT ck_player_mana, "
+               "DROP CONSTRAINT ck_player_xp")
 
     # Remove check constraints from the user_settings table
     op.drop_constraint('ck_user_settings_audio_volume', 'user_settings')
@@ -0,0 +1,28 @@
+"""add lookup indexes
+
+Revision ID: b71e0c2d94a3
+Revises: d42d51f2e311
+Create Date: 2024-06-02 14:21:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71e0c2d94a3'
+down_revision = 'd42d51f2e311'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_entity_island_type', 'entity', ['island_id', 'type'])
+    op.create_index('ix_placeable_island_type', 'placeable', ['island_id', 'type'])
+    op.create_index('ix_friend_request_receiver', 'friend_request', ['receiver_id'])
+
+
+def downgrade():
+    op.drop_index('ix_friend_request_receiver', table_name='friend_request')
+    op.drop_index('ix_placeable_island_type', table_name='placeable')
+    op.drop_index('ix_entity_island_type', table_name='entity')
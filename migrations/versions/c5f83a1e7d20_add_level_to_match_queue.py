@@ -0,0 +1,30 @@
+"""add level to match queue
+
+Revision ID: c5f83a1e7d20
+Revises: b71e0c2d94a3
+Create Date: 2024-06-02 16:05:12.540391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f83a1e7d20'
+down_revision = 'b71e0c2d94a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('match_queue', sa.Column('level', sa.Integer(), nullable=False, server_default='0'))
+    # Populate the denormalized level of the players that are already queued
+    op.execute('UPDATE match_queue SET level = entity.level '
+               'FROM player_entity, entity '
+               'WHERE player_entity."Player" = match_queue.player_id AND entity.entity_id = player_entity.entity_id')
+    op.create_index('ix_match_queue_level', 'match_queue', ['level'])
+
+
+def downgrade():
+    op.drop_index('ix_match_queue_level', table_name='match_queue')
+    op.drop_column('match_queue', 'level')
@@ -18,17 +18,18 @@ depends_on = None
 
 def upgrade():
     # ### commands auto generated by Alembic - please adjust! ###
-    with op.batch_alter_table('user_settings', schema=None) as batch_op:
-        batch_op.add_column(sa.Column('sprint_key', sa.String(length=12), nullable=False, server_default='ShiftLeft'))
-        batch_op.add_column(sa.Column('sprint_val', sa.String(length=12), nullable=True))
+    # Both columns in a single ALTER TABLE. The constant default makes this a metadata-only change (no table rewrite)
+    op.execute("ALTER TABLE user_settings "
+               "ADD COLUMN sprint_key VARCHAR(12) NOT NULL DEFAULT 'ShiftLeft', "
+               "ADD COLUMN sprint_val VARCHAR(12)")
 
     # ### end Alembic commands ###
 
 
 def downgrade():
     # ### commands auto generated by Alembic - please adjust! ###
-    with op.batch_alter_table('user_settings', schema=None) as batch_op:
-        batch_op.drop_column('sprint_val')
-        batch_op.drop_column('sprint_key')
+    op.execute("ALTER TABLE user_settings "
+               "DROP COLUMN sprint_val, "
+               "DROP COLUMN sprint_key")
 
     # ### end Alembic commands ###
@@ -0,0 +1,33 @@
+"""compact entity columns
+
+Revision ID: e3a9d6b04f17
+Revises: c5f83a1e7d20
+Create Date: 2024-06-03 10:47:55.861230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9d6b04f17'
+down_revision = 'c5f83a1e7d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # All columns in a single ALTER TABLE, so the table is only rewritten once
+    op.execute("ALTER TABLE entity "
+               "ALTER COLUMN xpos TYPE SMALLINT, "
+               "ALTER COLUMN ypos TYPE SMALLINT, "
+               "ALTER COLUMN zpos TYPE SMALLINT, "
+               "ALTER COLUMN level TYPE SMALLINT")
+
+
+def downgrade():
+    op.execute("ALTER TABLE entity "
+               "ALTER COLUMN xpos TYPE INTEGER, "
+               "ALTER COLUMN ypos TYPE INTEGER, "
+               "ALTER COLUMN zpos TYPE INTEGER, "
+               "ALTER COLUMN level TYPE INTEGER")
@@ -0,0 +1,39 @@
+"""denormalize fuse task
+
+Revision ID: e7c2b9f41a08
+Revises: e3a9d6b04f17
+Create Date: 2024-06-03 15:32:08.417763
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c2b9f41a08'
+down_revision = 'e3a9d6b04f17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Move crystal_amount onto the task table, FuseTask becomes single table inheritance
+    op.add_column('task', sa.Column('crystal_amount', sa.Integer(), nullable=True))
+    op.execute("UPDATE task SET crystal_amount = fuse_task.crystal_amount FROM fuse_task WHERE fuse_task.id = task.id")
+    op.create_check_constraint('ck_task_crystal_amount', 'task',
+                               "type <> 'fuse_task' OR (crystal_amount IS NOT NULL AND crystal_amount >= 0)")
+    op.drop_table('fuse_task')
+
+
+def downgrade():
+    op.create_table('fuse_task',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('crystal_amount', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id'], ['task.id'], onupdate='cascade', ondelete='cascade'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_check_constraint('ck_crystal_amount', 'fuse_task', 'crystal_amount >= 0')
+    op.execute("INSERT INTO fuse_task (id, crystal_amount) SELECT id, crystal_amount FROM task WHERE type = 'fuse_task'")
+
+    op.drop_constraint('ck_task_crystal_amount', 'task', type_='check')
+    op.drop_column('task', 'crystal_amount')
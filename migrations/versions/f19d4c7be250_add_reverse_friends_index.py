@@ -0,0 +1,24 @@
+"""add reverse friends index
+
+Revision ID: f19d4c7be250
+Revises: e7c2b9f41a08
+Create Date: 2024-06-04 09:12:40.295518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f19d4c7be250'
+down_revision = 'e7c2b9f41a08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_friends_reverse', 'friends_association', ['friend_id', 'player_id'])
+
+
+def downgrade():
+    op.drop_index('ix_friends_reverse', table_name='friends_association')
@@ -1,21 +1,20 @@
 import logging
 import os
-from json import JSONEncoder
+from concurrent.futures import ThreadPoolExecutor
 from logging.handlers import RotatingFileHandler
 
+import orjson
 import werkzeug.exceptions
 from concurrent_log_handler import ConcurrentRotatingFileHandler
 from dotenv import load_dotenv
 from flask import Flask, jsonify, redirect, request
+from flask.json.provider import JSONProvider
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from flask_migrate import check as check_db_schema
 from flask_migrate import upgrade as upgrade_db_schema
-from flask_restful_swagger_3 import get_swagger_blueprint
 from flask_socketio import SocketIO
-from flask_sqlalchemy import SQLAlchemy
 from oauthlib.oauth2 import WebApplicationClient
-from sqlalchemy.orm import DeclarativeBase
 
 """
 This is the main entry point for the application.
@@ -25,62 +24,85 @@ When using a production server, use the WSGI script (wsgi.py) with a production
 """
 
 
-class Base(DeclarativeBase):
-    pass
-
-
 class JSONClassEncoder:
     """
     JSON Encoder that calls to_json() on objects
+    Encoding itself is done by orjson, which is a lot faster than the stdlib JSONEncoder
     """
 
+    # Cache of whether a type implements _to_json(), resolved once per type
+    _has_to_json: dict[type, bool] = {}
+
     def __init__(self, *args, **kwargs):
+        # Flask-RESTful passes the json.dumps() keyword arguments (indent, sort_keys, ...), we ignore them
         pass
 
-    def default(self, o):
-        if hasattr(o, '_to_json'):
-            return JSONEncoder().default(o._to_json())
-        else:
-            return JSONEncoder().default(o)
+    @staticmethod
+    def default(o):
+        """
+        Called by orjson for objects it cannot serialize natively
+        :param o: The object to serialize
+        :return: A JSON serializable representation of the object
+        """
+        t = type(o)
+        has_to_json = JSONClassEncoder._has_to_json.get(t)
+        if has_to_json is None:
+            has_to_json = any('_to_json' in klass.__dict__ for klass in t.__mro__)
+            JSONClassEncoder._has_to_json[t] = has_to_json
+
+        if has_to_json:
+            return o._to_json()
+        raise TypeError(f"Object of type {t.__name__} is not JSON serializable")
 
     def encode(self, o):
-        if hasattr(o, '_to_json'):
-            return JSONEncoder().encode(o._to_json())
-        else:
-            return JSONEncoder().encode(o)
+        return orjson.dumps(o, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider (used by jsonify, request.get_json(), ...) backed by orjson
+    Flask-RESTful responses don't go through this provider, those use the JSONClassEncoder (see RESTFUL_JSON)
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        # The stdlib json.dumps() keyword arguments are ignored, just like in JSONClassEncoder
+        return orjson.dumps(obj, default=JSONClassEncoder.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 
 # Load environment variables
 assert load_dotenv(".env"), "unable to load .env file"
 from os import environ
 from src.logger_formatter import CustomFormatter
+from src.model import db
+
+# Whether the app runs in debug mode, read once from the environment
+debug_mode: bool = environ.get('APP_DEBUG', "false") == "true"
 
 # Configure the logger
+# The stream handler has its own (colored) formatter, the file handler shares this precompiled one
+file_formatter = logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s',
+                                   datefmt=None if debug_mode else '%Y-%m-%d %H:%M:%S')
 
 handlers = []
 logfile = environ.get('APP_LOG_FILE', None)
 if logfile:
     fh = ConcurrentRotatingFileHandler(logfile, maxBytes=100000, backupCount=1)  # Set delay to prevent WinError 32
+    fh.setFormatter(file_formatter)
     handlers.append(fh)
 
 streamHandler = logging.StreamHandler()
 streamHandler.setFormatter(CustomFormatter())
 handlers.append(streamHandler)
 
-if environ.get('APP_DEBUG', "false") == "true":
-    logging.basicConfig(level=logging.DEBUG,
-                        format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s',
-                        handlers=handlers)
+logging.basicConfig(level=logging.DEBUG if debug_mode else logging.INFO, handlers=handlers)
+if debug_mode:
     logging.debug("Debug mode enabled")
-else:
-    logging.basicConfig(level=logging.INFO,
-                        format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s',
-                        datefmt='%Y-%m-%d %H:%M:%S',
-                        handlers=handlers
-                        )
-
-db: SQLAlchemy = SQLAlchemy(model_class=Base)
+
 app: Flask = Flask(environ.get('APP_NAME'))
+app.json = OrjsonProvider(app)
 
 @app.errorhandler(Exception)
 def log_exception(error):
@@ -141,23 +163,28 @@ def setup_jwt(app: Flask):
     # Add a custom error handler for JWT errors
     _jwt_log = logging.getLogger("_jwt")
 
+    # The error bodies are static, so serialize them once instead of on every rejected request
+    json_headers = {'Content-Type': 'application/json'}
+    invalid_token_body = orjson.dumps({'status': 'error', 'message': 'Unauthorized', 'type': 'jwt_invalid_token'})
+    no_cookie_body = orjson.dumps({'status': 'error', 'message': 'Unauthorized', 'type': 'jwt_no_cookie'})
+    expired_token_body = orjson.dumps({'status': 'error', 'message': 'Token has expired (log back in)', 'type': 'jwt_token_expired'})
+
     @app.jwt.invalid_token_loader
     @app.jwt.token_verification_failed_loader
     def custom_invalid_token_loader(callback):
         _jwt_log.debug(f"Invalid token (check format?): {callback}")
-        return jsonify({'status': 'error', 'message': 'Unauthorized', 'type': 'jwt_invalid_token'}), 401
+        return invalid_token_body, 401, json_headers
 
     @app.jwt.unauthorized_loader
     def custom_unauthorized_loader(callback):
         _jwt_log.debug(f"Unauthorized (no cookie?): {callback}")
-        return jsonify({'status': 'error', 'message': 'Unauthorized', 'type': 'jwt_no_cookie'}), 401
+        return no_cookie_body, 401, json_headers
 
     @app.jwt.expired_token_loader
     def custom_expired_token_loader(jwt_header, jwt_data):
         _jwt_log.debug(f"Expired token (log back in): {jwt_header}, {jwt_data}")
         # return redirect("/landing", code=401)
-        return jsonify(
-            {'status': 'error', 'message': 'Token has expired (log back in)', 'type': 'jwt_token_expired'}), 401
+        return expired_token_body, 401, json_headers
 
 
 def setup(app: Flask):
@@ -177,9 +204,7 @@ def setup(app: Flask):
     app.secret_key = environ.get('APP_SECRET_KEY') or '*^*(*&)(*)(*afafafaSDD47j\3yX R~X@H!jmM]Lwf/,?KT'
 
     # Load config variables from environment variables
-    for var in environ:
-        if var.startswith('APP_'):
-            app.config[var] = environ.get(var)
+    app.config.update({var: val for var, val in environ.items() if var.startswith('APP_')})
 
     # Check if requires config variables are set
     assert app.config.get('APP_POSTGRES_USER') is not None, "APP_POSTGRES_USER not set"
@@ -190,6 +215,15 @@ def setup(app: Flask):
         (f"postgresql://{app.config['APP_POSTGRES_USER']}:{app.config['APP_POSTGRES_PASSWORD']}"
          f"@{app.config['APP_POSTGRES_HOST']}:{app.config['APP_POSTGRES_PORT']}"
          f"/{app.config['APP_POSTGRES_DATABASE']}")
+    # Bound the connection pool shared by all request threads, and ping connections on checkout so connections that
+    # were dropped (eg by a database restart or an idle timeout) are replaced instead of failing the first query
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(app.config.get('APP_DB_POOL_SIZE', 20)),
+        'max_overflow': int(app.config.get('APP_DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(app.config.get('APP_DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(app.config.get('APP_DB_POOL_RECYCLE', 3600)),
+        'pool_pre_ping': True
+    }
 
     # Needed to have Flask to propagate exceptions in order to have the JWT exception handlers to work properly
     # See SCRUM-45
@@ -199,14 +233,18 @@ def setup(app: Flask):
     setup_jwt(app)
 
     # Initialize the db with our Flask instance
+    # The models use the module-level db from src.model directly, app.db is kept for current_app.db.session access
     db.init_app(app)
     app.db = db
 
     # Configure OAuth2 client
-    if app.config.get("APP_DEBUG", "false") == "true":
+    if debug_mode:
         # Allow insecure transport in debug mode
         os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
+    # Thread pool for the (CPU heavy) bcrypt password hashing, see src/model/credentials.py
+    app.extensions['bcrypt_pool'] = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix='bcrypt')
+
     # Initialize the OAuth2 client, this client will be used to authenticate users with the OAuth2 (Google) server
     app.oauth_client = None
     if app.config.get('APP_OAUTH_ENABLED', 'false') == 'true':
@@ -224,8 +262,10 @@ def setup(app: Flask):
         app.config['RESTFUL_JSON'] = {'cls': JSONClassEncoder}
 
         # Create all API endpoints
-        from src.resource import attach_resources
+        from src.resource import attach_resources, freeze_openapi
         attach_resources(app)
+        # All endpoints are documented now, the swagger documentation must not change at request time anymore
+        freeze_openapi()
 
         # Create the tables in the db, AFTER entities are imported
         # Create the DB migration manager
@@ -242,6 +282,7 @@ def setup(app: Flask):
 
         # Setup SWAGGER API documentation (only when enabled)
         if app.config.get('APP_SWAGGER_ENABLED', "false") == 'true':
+            from flask_restful_swagger_3 import get_swagger_blueprint
             from src.resource import openapi_dict
             logging.info("Setting up Swagger API documentation")
             app.config['SWAGGER_BLUEPRINT_URL_PREFIX'] = '/api/docs'
@@ -257,13 +298,21 @@ def setup(app: Flask):
         from src.socketio import attach_namespaces
         attach_namespaces(app)
 
+        # Check that the configured bcrypt cost hashes in a sane amount of time on this machine
+        from src.model.credentials import bcrypt_cost, benchmark_bcrypt_cost
+        hash_time = benchmark_bcrypt_cost(bcrypt_cost())
+        if not 0.15 <= hash_time <= 0.5:
+            logging.warning(f"Hashing a password with bcrypt cost {bcrypt_cost()} took {hash_time * 1000:.0f} ms, "
+                            f"consider tuning APP_BCRYPT_COST to take between 150 and 500 ms")
+
         # Annoy user when data ownership is not strictly enforced
         if app.config.get('CHECK_DATA_OWNERSHIP', 'true') != 'true':
             logging.warning("Data ownership checks will not block requests (they will log a warning).")
 
-        # Generate documentation
-        from documentation import generate_pdoc
-        generate_pdoc(generate=app.config.get('APP_GENERATE_DOCS', 'false') == 'true')  # to generate documentation set parameter to true: generate_pdoc(True)
+        # Generate documentation (only when enabled, importing pdoc is expensive)
+        if app.config.get('APP_GENERATE_DOCS', 'false') == 'true':
+            from documentation import generate_pdoc
+            generate_pdoc(generate=True)
     return app, app.socketio
 
 
@@ -20,7 +20,13 @@ class CustomFormatter(logging.Formatter):
         logging.CRITICAL: bold_red + format + reset
     }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Build the formatter of each level once, instead of creating a new one for every record
+        self._formatters = {level: logging.Formatter(fmt) for level, fmt in self.FORMATS.items()}
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
+        formatter = self._formatters.get(record.levelno)
+        if formatter is None:  # custom log level, fall back to the uncolored format
+            return super().format(record)
         return formatter.format(record)
\ No newline at end of file
@@ -0,0 +1,11 @@
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import DeclarativeBase
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+# The Flask-SQLAlchemy extension, bound to the app in setup() (see app.py)
+# Defined at module level so the models can be imported without an active app context
+db: SQLAlchemy = SQLAlchemy(model_class=Base)
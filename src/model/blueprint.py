@@ -1,11 +1,14 @@
-from flask import current_app
-from sqlalchemy import SmallInteger, String, Column, Integer
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import SmallInteger, String, Column, Integer, CheckConstraint, select, Row
 from sqlalchemy.orm import mapped_column, Mapped
 
+from src.model import db
 from src.model.enums import BlueprintType
 
 
-class Blueprint(current_app.db.Model):
+class Blueprint(db.Model):
     """
     A blueprint object is a representation of a building that can be built in the game
     """
@@ -13,8 +16,8 @@ class Blueprint(current_app.db.Model):
     id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
     name: Mapped[str] = Column(String(32), nullable=False, unique=True)
     description: Mapped[str] = Column(String(256), nullable=False, default='')
-    cost: Mapped[int] = Column(Integer, nullable=False, default=0)
-    buildtime: Mapped[int] = Column(Integer, nullable=False, default=0) # in seconds
+    cost: Mapped[int] = Column(Integer, CheckConstraint('cost >= 0', name='ck_blueprint_cost'), nullable=False, default=0)
+    buildtime: Mapped[int] = Column(Integer, CheckConstraint('buildtime >= 0', name='ck_blueprint_buildtime'), nullable=False, default=0) # in seconds
 
 
     def __init__(self, id: int = None, name: str = None, description: str = None, cost: int = 0, buildtime: int = 0):
@@ -25,12 +28,8 @@ class Blueprint(current_app.db.Model):
         :param description: The description of the blueprint (eg what does the building it creates do)
         :param cost: The cost to build the building of this blueprint
         :param buildtime: The time it takes to build the building of this blueprint
+        Note: cost & buildtime >= 0 are enforced by the database CHECK constraints (see migration aa541bef480)
         """
-        if cost < 0:
-            raise ValueError("Cost must be greater than or equal to 0")
-        if buildtime < 0:
-            raise ValueError("Buildtime must be greater than or equal to 0")
-
         self.id = id
         self.name = name
         self.description = description
@@ -41,14 +40,10 @@ class Blueprint(current_app.db.Model):
     def update(self, data: dict):
         """
         Update the blueprint object with the given data
+        cost & buildtime >= 0 are enforced by the database CHECK constraints
         :param data:
         :return:
         """
-        if data.get('cost', self.cost) < 0:
-            raise ValueError("Cost must be greater than or equal to 0")
-        if data.get('buildtime', self.buildtime) < 0:
-            raise ValueError("Buildtime must be greater than or equal to 0")
-
         self.name = data.get('name', self.name)
         self.description = data.get('description', self.description)
         self.cost = data.get('cost', self.cost)
@@ -62,5 +57,13 @@ class Blueprint(current_app.db.Model):
         return BlueprintType(self.id)
 
 
-
-
+@lru_cache(maxsize=256)
+def get_blueprint_row(blueprint_id: int) -> Optional[Row]:
+    """
+    Get a blueprint as a plain (read-only) row, cached per process
+    Blueprints are static reference data, only admins change them. After such a change, call get_blueprint_row.cache_clear()
+    A row is cached rather than a Blueprint object, as ORM objects are bound to the session (and request) that loaded them
+    :param blueprint_id: The id of the blueprint
+    :return: The row (with the same attribute names as Blueprint), or None if the blueprint does not exist
+    """
+    return db.session.execute(select(*Blueprint.__table__.columns).where(Blueprint.id == blueprint_id)).one_or_none()
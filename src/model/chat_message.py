@@ -1,11 +1,12 @@
 import datetime
 
-from flask import current_app
-from sqlalchemy import Column, DateTime, func, String, Integer, ForeignKey
+from sqlalchemy import Column, DateTime, func, String, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
+from src.model import db
 
-class ChatMessage(current_app.db.Model):
+
+class ChatMessage(db.Model):
     """
     A chat message object is a message sent by a player in the game
     It is always 'submitted' through the websocket, thus there is no need for a POST endpoint
@@ -23,3 +24,8 @@ class ChatMessage(current_app.db.Model):
         self.created_at = datetime.datetime.now()
         self.message = message
         self.user_id = user_id
+
+    __table_args__ = (
+        # The chat list pages through the messages of a user by descending id
+        Index('ix_chat_message_user_id', 'user_id', 'id'),
+    )
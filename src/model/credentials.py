@@ -1,12 +1,87 @@
+import hashlib
+import threading
+import time
 from abc import abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Union
 
 import bcrypt
 from flask import current_app
 from sqlalchemy import ForeignKey, BigInteger, Column, String, LargeBinary
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 
+from src.model import db
 
-class Credentials(current_app.db.Model):
+
+# Process-local LRU cache of successful bcrypt verifications, keyed by sha256(password_hash + password)
+# The plaintext password is never stored, and a password change invalidates the entries as the stored hash changes
+_VERIFIED_CACHE_SIZE = 1024
+_verified_cache: OrderedDict = OrderedDict()
+_verified_cache_lock = threading.Lock()
+
+# In-flight bcrypt verifications, using the same keys as the cache above
+# Concurrent verifications of the same (hash, password) pair wait on the first one instead of hashing again
+_inflight_checks: dict[bytes, Future] = {}
+_inflight_checks_lock = threading.Lock()
+
+
+def bcrypt_cost() -> int:
+    """
+    Get the configured bcrypt cost (work factor), from the APP_BCRYPT_COST config variable
+    :return: The bcrypt cost, defaults to 12
+    """
+    return int(current_app.config.get('APP_BCRYPT_COST', 12))
+
+
+def benchmark_bcrypt_cost(cost: int) -> float:
+    """
+    Time a single bcrypt hash with the given cost
+    :param cost: The bcrypt cost to benchmark
+    :return: The time it took to hash, in seconds
+    """
+    start = time.perf_counter()
+    bcrypt.hashpw(b'benchmark', bcrypt.gensalt(rounds=cost))
+    return time.perf_counter() - start
+
+
+def _to_bytes(password: Union[str, bytes]) -> bytes:
+    """
+    Get the UTF-8 encoded password, without encoding again if it already is bytes
+    """
+    return password if isinstance(password, bytes) else password.encode('utf-8')
+
+
+def _checkpw(password: bytes, password_hash: bytes, key: bytes) -> bool:
+    """
+    Run bcrypt.checkpw on the bcrypt thread pool (see setup() in app.py)
+    bcrypt releases the GIL, the pool bounds the amount of concurrent hashes to the amount of CPU cores
+    If the same verification (same key) is already running, its result is awaited instead
+    :param key: sha256(password_hash + password), identifies the verification
+    """
+    with _inflight_checks_lock:
+        future = _inflight_checks.get(key)
+        owner = future is None
+        if owner:
+            future = current_app.extensions['bcrypt_pool'].submit(bcrypt.checkpw, password, password_hash)
+            _inflight_checks[key] = future
+
+    try:
+        return future.result()
+    finally:
+        if owner:
+            with _inflight_checks_lock:
+                del _inflight_checks[key]
+
+
+def _hashpw(password: bytes, salt: bytes) -> bytes:
+    """
+    Run bcrypt.hashpw on the bcrypt thread pool (see setup() in app.py)
+    """
+    return current_app.extensions['bcrypt_pool'].submit(bcrypt.hashpw, password, salt).result()
+
+
+class Credentials(db.Model):
     """
     Abstract base class for credentials
     Credentials are used to authenticate a user, it can be a password, an OAuth token, etc.
@@ -25,7 +100,8 @@ class Credentials(current_app.db.Model):
 
     __mapper_args__ = {
         'polymorphic_abstract': True,
-        'polymorphic_on': type
+        'polymorphic_on': type,
+        'with_polymorphic': '*'  # Load the subclass columns in the same query instead of one SELECT per row
     }
 
 
@@ -48,33 +124,55 @@ class PasswordCredentials(Credentials):
         """
         Attempts authentication by checking if the user provided password matches the stored hash
         This comparisations is safe from timing attacks as per bcrypt's design
-        :param loginData: The logindata, containing the plaintext password in a dict
+        :param loginData: The logindata, containing the plaintext password (str or UTF-8 encoded bytes) in a dict
         :return: True if the password matches, False otherwise
+        :raises ValueError: If no password is provided
         """
-        assert 'password' in loginData, "Password not provided"
+        if 'password' not in loginData:
+            raise ValueError("Password not provided")
+        password = _to_bytes(loginData['password'])
+
+        # Only successful verifications are cached, so a wrong password always pays the full bcrypt cost
+        key = hashlib.sha256(self.password_hash + password).digest()
+        with _verified_cache_lock:
+            if key in _verified_cache:
+                _verified_cache.move_to_end(key)
+                return True
+
         # Timing attack safe function
-        match = bcrypt.checkpw(loginData['password'].encode('utf-8'), self.password_hash)
+        match = _checkpw(password, self.password_hash, key)
+        if match:
+            # Rehash-on-login: upgrade hashes that were created with a lower cost than the one currently configured
+            # The hash format is $2b$<cost>$<salt+hash>
+            if int(self.password_hash[4:6]) < bcrypt_cost():
+                self.change_password(password)
+                key = hashlib.sha256(self.password_hash + password).digest()
+
+            with _verified_cache_lock:
+                _verified_cache[key] = None
+                if len(_verified_cache) > _VERIFIED_CACHE_SIZE:
+                    _verified_cache.popitem(last=False)
         return match
 
-    def change_password(self, new_password: str):
+    def change_password(self, new_password: Union[str, bytes]):
         """
         Change the password by creating a new hash with a new salt
-        :param new_password: The new plaintext password
+        :param new_password: The new plaintext password (str or UTF-8 encoded bytes)
         """
-        self.password_salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(new_password.encode('utf-8'), self.password_salt)
+        self.password_salt = bcrypt.gensalt(rounds=bcrypt_cost())
+        self.password_hash = _hashpw(_to_bytes(new_password), self.password_salt)
 
 
     @staticmethod
-    def create_from_password(password: str) -> 'PasswordCredentials':
+    def create_from_password(password: Union[str, bytes]) -> 'PasswordCredentials':
         """
         Create a new PasswordCredentials object from a password string
         A random, cryptographically secure salt is generated and stored with the hash
-        :param password: The plaintext password
+        :param password: The plaintext password (str or UTF-8 encoded bytes)
         :return: The PasswordCredentials object
         """
-        password_salt = bcrypt.gensalt()
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), password_salt)
+        password_salt = bcrypt.gensalt(rounds=bcrypt_cost())
+        password_hash = _hashpw(_to_bytes(password), password_salt)
         return PasswordCredentials(password_hash, password_salt)
 
     __mapper_args__ = {
@@ -102,8 +200,10 @@ class OAuth2Credentials(Credentials):
         The SSO ID is unique and cannot be changed, so it's safe to use it for authentication
         :param loginData: The logindata, containing the SSO ID in a dict
         :return: True if the SSO IDs match, False otherwise
+        :raises ValueError: If no SSO ID is provided
         """
-        assert 'sso_id' in loginData, "sso_id not provided"
+        if 'sso_id' not in loginData:
+            raise ValueError("sso_id not provided")
         return loginData['sso_id'] == self.sso_id
 
 
@@ -1,9 +1,24 @@
-from flask import current_app
-from sqlalchemy import BigInteger, Integer, Column, String, ForeignKey, CheckConstraint
+from sqlalchemy import BigInteger, SmallInteger, Column, String, ForeignKey, CheckConstraint, Index
 from sqlalchemy.orm import mapped_column, Mapped, relationship, declared_attr
 
+from src.model import db
 
-class Entity(current_app.db.Model):
+# The (inclusive) range of the SmallInteger columns
+_SMALLINT_MIN, _SMALLINT_MAX = -32768, 32767
+
+
+def _check_smallint(name: str, value: int) -> None:
+    """
+    Check that a value fits in its SmallInteger column, so it's rejected before it reaches the database
+    :param name: The name of the value, used in the error message
+    :param value: The value to check
+    :raises ValueError: If the value is out of the SmallInteger range
+    """
+    if not _SMALLINT_MIN <= value <= _SMALLINT_MAX:
+        raise ValueError(f"{name} must be in the range [{_SMALLINT_MIN},{_SMALLINT_MAX}]")
+
+
+class Entity(db.Model):
     """
     Abstract class for entities that have to be persistent (such as players, minions etc)
     In contradiction to Placable, the coordinates are absolute from in the THREE.js world and not transformed onto a grid.
@@ -19,11 +34,12 @@ class Entity(current_app.db.Model):
 
     type: Mapped[str] = Column(String(32)) # Keep track of polymorphic identities
 
-    xpos: Mapped[int] = Column(Integer, nullable=False, default=0)
-    ypos: Mapped[int] = Column(Integer, nullable=False, default=0)
-    zpos: Mapped[int] = Column(Integer, nullable=False, default=0)
+    # Island coordinates and levels stay well within the SmallInteger range (-32768, 32767), which halves their size
+    xpos: Mapped[int] = Column(SmallInteger, nullable=False, default=0)
+    ypos: Mapped[int] = Column(SmallInteger, nullable=False, default=0)
+    zpos: Mapped[int] = Column(SmallInteger, nullable=False, default=0)
 
-    level: Mapped[int] = Column(Integer, CheckConstraint('level >= 0'), nullable=False, default=0)
+    level: Mapped[int] = Column(SmallInteger, CheckConstraint('level >= 0'), nullable=False, default=0)
 
 
     def __init__(self, island_id: int = 0, xpos: int = 0, ypos: int = 0, zpos: int = 0, level: int = 0):
@@ -37,6 +53,8 @@ class Entity(current_app.db.Model):
         """
         if level < 0:
             raise ValueError("Level must be greater than or equal to 0")
+        for name, value in (('x', xpos), ('y', ypos), ('z', zpos), ('level', level)):
+            _check_smallint(name, value)
 
         self.island_id = island_id
         self.xpos = xpos
@@ -53,6 +71,9 @@ class Entity(current_app.db.Model):
         """
         if data.get('level', self.level) < 0:
             raise ValueError("Level must be greater than or equal to 0")
+        for name in ('x', 'y', 'z', 'level'):
+            if name in data:
+                _check_smallint(name, data[name])
 
         self.xpos = data.get('x', self.xpos)
         self.zpos = data.get('z', self.zpos)
@@ -60,7 +81,13 @@ class Entity(current_app.db.Model):
         self.level = data.get('level', self.level)
 
 
+    __table_args__ = (
+        # Island loads select the entities of an island, discriminated by type
+        Index('ix_entity_island_type', 'island_id', 'type'),
+    )
+
     __mapper_args__ = {
         # 'polymporphic_abstract': True,
-        'polymorphic_on': 'type'
+        'polymorphic_on': 'type',
+        'with_polymorphic': '*'  # Load the subclass columns in the same query instead of one SELECT per row
     }
@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class TowerBuildingType(Enum):
@@ -7,9 +7,10 @@ class TowerBuildingType(Enum):
     """
     MAGIC = 'magic'
 
-    @classmethod
-    def has_value(cls, value):
-        return value in cls._value2member_map_
+
+# Value -> member lookup tables, used to validate and convert user input in one dict lookup
+# (eg TOWER_BUILDING_TYPES.get('magic') -> TowerBuildingType.MAGIC, None if the value is invalid)
+TOWER_BUILDING_TYPES = {e.value: e for e in TowerBuildingType}
 
 
 class MineBuildingType(Enum):
@@ -18,9 +19,8 @@ class MineBuildingType(Enum):
     """
     CRYSTAL = 'crystal'
 
-    @classmethod
-    def has_value(cls, value):
-        return value in cls._value2member_map_
+
+MINE_BUILDING_TYPES = {e.value: e for e in MineBuildingType}
 
 
 class GemType(Enum):
@@ -36,14 +36,14 @@ class GemType(Enum):
     AMBER = 'amber'
 
 
-    @classmethod
-    def has_value(cls, value):
-        return value in cls._value2member_map_
+GEM_TYPES = {e.value: e for e in GemType}
+
 
 
-class BlueprintType(Enum):
+class BlueprintType(IntEnum):
     """
     An enum for the different types of blueprints associated with their id in the db
+    Being an IntEnum, the members compare, hash and bind (in SQL parameters) as their integer id
     """
     ALTAR = 1
     MINE = 2
@@ -55,15 +55,3 @@ class BlueprintType(Enum):
     # Props
     BUSH = 6
     TREE = 7
-    @classmethod
-    def has_value(cls, value):
-        return value in cls._value2member_map_
-
-    def __eq__(self, other):
-        if isinstance(other, BlueprintType):
-            return self.value == other.value
-        elif isinstance(other, int):
-            return self.value == other
-        return False
-
-
@@ -1,9 +1,10 @@
-from flask import current_app
-from sqlalchemy import Column, BigInteger, ForeignKey, UniqueConstraint, CheckConstraint
+from sqlalchemy import Column, BigInteger, ForeignKey, UniqueConstraint, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 
+from src.model import db
 
-class FriendRequest(current_app.db.Model):
+
+class FriendRequest(db.Model):
     """
     A friend request is a request from one player to another to become friends
     A friend request is deleted when it is accepted (and the players are added to each other's friends list) or rejected (ignored)
@@ -18,7 +19,9 @@ class FriendRequest(current_app.db.Model):
 
     __table_args__ = (
         UniqueConstraint('sender_id', 'receiver_id', name='unique_sender_receiver'),
-        CheckConstraint('sender_id != receiver_id')
+        CheckConstraint('sender_id != receiver_id'),
+        # The unique constraint only covers lookups by sender_id, incoming requests are looked up by receiver_id
+        Index('ix_friend_request_receiver', 'receiver_id')
     )
 
     def __init__(self, sender: 'Player', receiver: 'Player'):
@@ -1,5 +1,5 @@
-from sqlalchemy import ForeignKey, BigInteger, CheckConstraint, Integer, Column, DateTime
-from sqlalchemy.orm import mapped_column, Mapped
+from sqlalchemy import Integer, Column, DateTime
+from sqlalchemy.orm import Mapped
 
 from src.model.task import Task
 
@@ -8,12 +8,13 @@ class FuseTask(Task):
     """
     A FuseTask is a task that represents the fusion of two gems inside a Fuse Table Building
     To retrieve the building this task is associated with, use the working_building attribute
-    """
-    __tablename__ = 'fuse_task'
 
-    id: Mapped[int] = mapped_column(BigInteger, ForeignKey('task.id', ondelete='cascade', onupdate='cascade'), primary_key=True)
+    FuseTask uses single table inheritance: its only column lives (nullable) on the task table,
+    so loading a Task collection needs no join or extra SELECT to resolve it
+    The ck_task_crystal_amount CHECK (declared on Task, see migration e7c2b9f41a08) requires the column on fuse tasks
+    """
 
-    crystal_amount: Mapped[int] = Column(Integer, CheckConstraint('crystal_amount >= 0'), nullable=False)
+    crystal_amount: Mapped[int] = Column(Integer, nullable=True)
 
 
     def __init__(self, endtime: DateTime, crystal_amount: int, island_id: int = None, working_building: "FuseTableBuilding" = None):
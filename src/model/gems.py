@@ -1,14 +1,28 @@
 import logging
 
 from flask import current_app
-from sqlalchemy import BigInteger, Enum, Column, ForeignKey, SmallInteger, String, Float, Boolean
+from sqlalchemy import BigInteger, Enum, Column, ForeignKey, SmallInteger, String, Float, Boolean, exists
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
-from src.model.enums import GemType
+from src.model.enums import GemType, GEM_TYPES
+from src.model import db
 
 
-class Gem(current_app.db.Model):
+def gem_attribute_ids() -> frozenset:
+    """
+    Get the ids of all GemAttributes
+    Only a fixed set of attributes exist, so the ids are loaded once per app and cached in app.extensions
+    :return: A frozenset of all valid gem_attribute_ids
+    """
+    ids = current_app.extensions.get('gem_attribute_ids')
+    if ids is None:
+        ids = frozenset(row.id for row in GemAttribute.query.with_entities(GemAttribute.id).all())
+        current_app.extensions['gem_attribute_ids'] = ids
+    return ids
+
+
+class Gem(db.Model):
     """
     A gem is a special type of item that can be used to boost buildings or mines
     A gem is unique, but can have multiple attributes (from the same set) with different multipliers
@@ -28,7 +42,7 @@ class Gem(current_app.db.Model):
     staked: Mapped[bool] = Column(Boolean(), nullable=False, default=False)
 
     # attributes: Mapped[list] = relationship('GemAttribute', secondary=association_table)
-    attributes_association = relationship("GemAttributeAssociation", cascade="all, delete-orphan")
+    attributes_association = relationship("GemAttributeAssociation", cascade="all, delete-orphan", lazy='selectin')
 
     # Using association proxy to access multiplier value
     # Ignore the type warning, it's wrong
@@ -47,10 +61,10 @@ class Gem(current_app.db.Model):
         if attributes is None:
             attributes = []
 
-        if not GemType.has_value(type):
+        if type not in GEM_TYPES:
             raise ValueError('Invalid gem type')
 
-        self.type = GemType[type.upper()]
+        self.type = GEM_TYPES[type]
         self.attributes = attributes
         self.player_id = player_id
         self.building_id = building_id
@@ -72,9 +86,9 @@ class Gem(current_app.db.Model):
 
 
         if 'type' in data:
-            if not GemType.has_value(data['type']):
+            if data['type'] not in GEM_TYPES:
                 raise ValueError('Invalid gem type')
-            self.type = GemType[data['type'].upper()]
+            self.type = GEM_TYPES[data['type']]
 
         if 'staked' in data:
             if not isinstance(data['staked'], bool):
@@ -82,55 +96,35 @@ class Gem(current_app.db.Model):
             self.staked = data['staked']
 
         if 'attributes' in data:
-            copy = data['attributes'].copy()
-            seen_ids = [assoc.attribute.id for assoc in self.attributes_association]
-            added_ids = []
-            for obj in copy:
+            incoming_by_id = {}
+            for obj in data['attributes']:
                 if 'gem_attribute_id' not in obj or 'multiplier' not in obj:
                     raise ValueError('Invalid attribute object. Either gem_attribute_id and/or multiplier is missing')
 
-                if 'gem_attribute_id' in obj:
-                    if not GemAttribute.query.get(obj['gem_attribute_id']):
-                        raise ValueError('Invalid gem_attribute_id')
-
-                if 'multiplier' in obj:
-                    if obj['multiplier'] < 0:
-                        raise ValueError('Multiplier must be >= 0')
-
-                # Cannot simply clear the map as this would mess with SQLAlchemys internal state of the entity
-                # We need therefore to update the existing map with the new values
-
-                # Update existing entries
-                found = False
-                for assoc in self.attributes_association:
-                   if assoc.attribute.id == obj['gem_attribute_id']:
-                       assoc.multiplier = obj['multiplier']
-                       found = True
-
-                if not found: # If the for loop didn't run
-                    if obj['gem_attribute_id'] in seen_ids:
-                        raise ValueError('Duplicate gem_attribute_id in attributes list')
-                    # Create new entries
-                    added_ids.append(obj['gem_attribute_id'])
-                    self.attributes_association.append(GemAttributeAssociation(**obj))
-                else:
-                    # Remove the entry from the data object if it was found in our own attributes
-                    copy.remove(obj)
+                if obj['multiplier'] < 0:
+                    raise ValueError('Multiplier must be >= 0')
+
+                if obj['gem_attribute_id'] in incoming_by_id:
+                    raise ValueError('Duplicate gem_attribute_id in attributes list')
+                incoming_by_id[obj['gem_attribute_id']] = obj
 
-            # Remove any remaining entries in our own attributes that were not found in the data object
-            for assoc in self.attributes_association:
-                if assoc.gem_attribute_id in added_ids:
-                    # Don't remove the entry if it was added in this update - these are also not fully initialized yet
-                    continue
+            if not gem_attribute_ids().issuperset(incoming_by_id.keys()):
+                raise ValueError('Invalid gem_attribute_id')
 
-                found = False
-                for obj in copy:
-                    if assoc.attribute.id == obj['gem_attribute_id']:
-                        found = True
-                        break
+            # Cannot simply clear the map as this would mess with SQLAlchemys internal state of the entity
+            # We need therefore to update the existing map with the new values
+            # Index on the FK column, assoc.attribute would lazy load the GemAttribute
+            by_id = {assoc.gem_attribute_id: assoc for assoc in self.attributes_association}
+
+            for attribute_id, obj in incoming_by_id.items():
+                if attribute_id in by_id: # Update existing entries
+                    by_id[attribute_id].multiplier = obj['multiplier']
+                else: # Create new entries
+                    self.attributes_association.append(GemAttributeAssociation(**obj))
 
-                if not found:
-                    self.attributes_association.remove(assoc)
+            # Remove the entries in our own attributes that were not found in the data object
+            for removed_id in by_id.keys() - incoming_by_id.keys():
+                self.attributes_association.remove(by_id[removed_id])
 
 
         if 'building_id' in data:
@@ -138,7 +132,8 @@ class Gem(current_app.db.Model):
                 self.building_id = None
             else:
                 from src.model.placeable.building import Building
-                if not Building.query.get(data['building_id']):
+                # SELECT EXISTS, the (joined-inheritance) building row itself is not loaded
+                if not db.session.query(exists().where(Building.placeable_id == data['building_id'])).scalar():
                     raise ValueError('Invalid building_id')
 
                 self.building_id = int(data['building_id'])
@@ -146,7 +141,7 @@ class Gem(current_app.db.Model):
         if 'player_id' in data:
             # Not nullable
             from src.model.player import Player
-            if not Player.query.get(data['player_id']):
+            if not db.session.query(exists().where(Player.user_profile_id == data['player_id'])).scalar():
                 raise ValueError('Invalid player_id')
 
             self.player_id = int(data['player_id'])
@@ -154,7 +149,7 @@ class Gem(current_app.db.Model):
         if self.building_id is None and self.player_id is None:
             logging.error(f"Gem {self.id} is orphaned. This is not supposed to happen. Please investigate")
 
-class GemAttribute(current_app.db.Model):
+class GemAttribute(db.Model):
     """
     A GemAttribute is a type of attribute that can be added to a gem
     Only a fixed set of attributes exist, therefore no enum is defined on the type
@@ -169,7 +164,7 @@ class GemAttribute(current_app.db.Model):
 
 
 # Association Object for Gem-GemAttribute with multiplier
-class GemAttributeAssociation(current_app.db.Model):
+class GemAttributeAssociation(db.Model):
     """
     Represents the relationship between a gem and a gem attribute with a multiplier as relationship attribute
     """
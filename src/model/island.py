@@ -1,11 +1,11 @@
-from flask import current_app
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import mapped_column, Mapped, relationship, declared_attr
 
+from src.model import db
 from src.model.player import Player
 
 
-class Island(current_app.db.Model):
+class Island(db.Model):
     """
     An island is a collection of entities and placeables (buildings) that are placed on a grid.
     It contains all necessary values to load in an island of a player.
@@ -14,21 +14,24 @@ class Island(current_app.db.Model):
 
     owner_id: Mapped[int] = mapped_column(ForeignKey('player.user_profile_id', use_alter=True, ondelete="cascade"), primary_key=True)
 
+    # The island contents are (nearly) always needed together with the island itself, so they're selectin loaded:
+    # one extra SELECT per collection instead of one per row
+
     @declared_attr
     def owner(self):
         return relationship("Player", back_populates="island", single_parent=True, foreign_keys=[self.owner_id])
 
     @declared_attr
     def entities(self):
-        return relationship("Entity", back_populates="island", cascade="all, delete-orphan")
+        return relationship("Entity", back_populates="island", cascade="all, delete-orphan", lazy='selectin')
 
     @declared_attr
     def placeables(self):
-        return relationship("Placeable", back_populates="island", cascade="all, delete-orphan")
+        return relationship("Placeable", back_populates="island", cascade="all, delete-orphan", lazy='selectin')
 
     @declared_attr
     def tasks(self):
-        return relationship("Task", back_populates="island", cascade="all, delete-orphan")
+        return relationship("Task", back_populates="island", cascade="all, delete-orphan", lazy='selectin')
 
     def __init__(self, owner: Player = None):
        self.owner = owner
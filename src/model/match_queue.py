@@ -1,7 +1,10 @@
-from flask import current_app
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import relationship
 
+from src.model import db
 
-class MatchQueueEntry(current_app.db.Model):
+
+class MatchQueueEntry(db.Model):
     """
     A MatchQueueEntry is an entry in the match queue, containing a player_id
     A player_id in this table is waiting for an opponent of the same level (or close to it)
@@ -11,8 +14,13 @@ class MatchQueueEntry(current_app.db.Model):
 
     __tablename__ = 'match_queue'
 
-    player_id = current_app.db.Column(current_app.db.Integer, current_app.db.ForeignKey('player.user_profile_id'), nullable=False, primary_key=True)
-    player = current_app.db.relationship('Player', back_populates='match_queue_entry')
+    player_id = Column(Integer, ForeignKey('player.user_profile_id'), nullable=False, primary_key=True)
+    player = relationship('Player', back_populates='match_queue_entry')
+
+    # The level of the player's entity at the time of queueing (denormalized)
+    # This allows matchmaking to find an opponent without joining the player and entity tables
+    level = Column(Integer, nullable=False, default=0, index=True)
 
-    def __init__(self, player_id):
-        self.player_id = player_id
\ No newline at end of file
+    def __init__(self, player_id, level: int = 0):
+        self.player_id = player_id
+        self.level = level
\ No newline at end of file
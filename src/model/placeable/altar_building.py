@@ -18,7 +18,7 @@ class AltarBuilding(Building):
         :param level: The level of the building
         :param rotation: The rotation of the building (0=North, 1=East, 2=South, 3=West)
         """
-        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.ALTAR.value, rotation=rotation)
+        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.ALTAR, rotation=rotation)
 
     def update(self, data: dict):
         """
@@ -16,7 +16,7 @@ class Building(Placeable):
 
     level: Mapped[int] = Column(SmallInteger(), CheckConstraint('level >= 0'), default=0, nullable=False)
 
-    gems: Mapped[List[Gem]] = relationship('Gem')
+    gems: Mapped[List[Gem]] = relationship('Gem', lazy='selectin')
 
     def __init__(self, island_id: int = 0, xpos: int = 0, zpos: int = 0, level: int = 0, blueprint_id: int = 0, rotation: int = 0) -> None:
         """
@@ -43,10 +43,11 @@ class Building(Placeable):
         :return:
         """
         super().update(data)
-        if data.get('level', self.level) < 0:
-            raise ValueError("Level must be greater than or equal to 0")
+        if 'level' in data:
+            if data['level'] < 0:
+                raise ValueError("Level must be greater than or equal to 0")
 
-        self.level = data.get('level', self.level)
+            self.level = data['level']
 
     __mapper_args__ = {
         'polymorphic_identity': 'building'
@@ -17,7 +17,7 @@ class FuseTableBuilding(Building):
         :param level: The level of the building
         :param rotation: The rotation of the building (0=North, 1=East, 2=South, 3=West)
         """
-        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.FUSE_TABLE.value, rotation=rotation)
+        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.FUSE_TABLE, rotation=rotation)
 
     def update(self, data: dict):
         """
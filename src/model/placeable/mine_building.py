@@ -3,7 +3,7 @@ import datetime
 from sqlalchemy import BigInteger, ForeignKey, Column, Enum as SqlEnum, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 
-from src.model.enums import MineBuildingType, BlueprintType
+from src.model.enums import MineBuildingType, BlueprintType, MINE_BUILDING_TYPES
 from src.model.placeable.building import Building
 
 
@@ -30,11 +30,11 @@ class MineBuilding(Building):
         :param last_collected: The last time the mine contents were collected
         :param rotation: The rotation of the building (0=North, 1=East, 2=South, 3=West)
         """
-        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.MINE.value, rotation=rotation)
-        if not MineBuildingType.has_value(mine_type):
+        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.MINE, rotation=rotation)
+        if mine_type not in MINE_BUILDING_TYPES:
             raise ValueError('Invalid mine_type')
 
-        self.mine_type = MineBuildingType[mine_type.upper()]
+        self.mine_type = MINE_BUILDING_TYPES[mine_type]
         self.last_collected = last_collected if last_collected is not None else datetime.datetime(1970, 1, 1, 0, 0)
 
 
@@ -47,13 +47,13 @@ class MineBuilding(Building):
         """
         super().update(data)
         if 'mine_type' in data:
-            if not MineBuildingType.has_value(data.get('mine_type', self.mine_type)):
+            if data['mine_type'] not in MINE_BUILDING_TYPES:
                 raise ValueError('Invalid mine_type')
 
-            # Ignore pycharm warning, it's wrong
-            self.mine_type = MineBuildingType[data.get('mine_type').upper()]
+            self.mine_type = MINE_BUILDING_TYPES[data['mine_type']]
 
-        self.last_collected = data.get('last_collected', self.last_collected)
+        if 'last_collected' in data:
+            self.last_collected = data['last_collected']
 
 
     __mapper_args__ = {
@@ -1,12 +1,13 @@
-from flask import current_app
-from sqlalchemy import BigInteger, String, Column, Integer, SmallInteger, ForeignKey, CheckConstraint, DateTime
-from sqlalchemy.orm import mapped_column, Mapped, relationship, declared_attr
+from sqlalchemy import BigInteger, String, Column, Integer, SmallInteger, ForeignKey, CheckConstraint, DateTime, Index, \
+    insert
+from sqlalchemy.orm import mapped_column, Mapped, relationship, declared_attr, Session
 
+from src.model import db
 from src.model.upgrade_task import BuildingUpgradeTask
 from src.model.task import Task
 
 
-class Placeable(current_app.db.Model):
+class Placeable(db.Model):
     """
     A placeable is an abstract class for all placeable (building& props)
     """
@@ -29,7 +30,7 @@ class Placeable(current_app.db.Model):
     blueprint_id: Mapped[int] = mapped_column(SmallInteger, ForeignKey('blueprint.id'), nullable=False, default=0)
     blueprint: Mapped["Blueprint"] = relationship('Blueprint')
 
-    task_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('task.id'), nullable=True)
+    task_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('task.id', ondelete='SET NULL'), nullable=True)
     task: Mapped[Task] = relationship("Task", back_populates="working_building", passive_deletes=True)
 
     def __init__(self, island_id: int = 0, xpos: int = 0, zpos: int = 0, blueprint_id: int = 0, rotation: int = 0):
@@ -41,16 +42,47 @@ class Placeable(current_app.db.Model):
         :param blueprint_id: The id of the blueprint that builds this placeable
         :param rotation: The rotation of the building (0=North, 1=East, 2=South, 3=West)
         """
-        if xpos < -7 or xpos > 7 or zpos < -7 or zpos > 7:
+        if not (-7 <= xpos <= 7 and -7 <= zpos <= 7):
             raise ValueError("xpos and/or zpos is out of bounds [-7,7]")
-        if rotation < 0 or rotation > 3:
+        if rotation & ~3:  # Any bit outside of 0b11 set (including negatives) means out of [0,3]
             raise ValueError("rotation is out of bounds [0,3]")
 
-        self.island_id = island_id
-        self.xpos = xpos
-        self.zpos = zpos
-        self.blueprint_id = blueprint_id
-        self.rotation = rotation
+        self.island_id, self.xpos, self.zpos, self.blueprint_id, self.rotation = island_id, xpos, zpos, blueprint_id, rotation
+
+    @staticmethod
+    def bulk_validate(rows: list) -> None:
+        """
+        Check the positions and rotations of many placeable rows at once, with the same bounds as __init__
+        Only the extremes are compared against the bounds, instead of checking every row separately
+        :param rows: A list of dicts, mapping the column (attribute) names to their values
+        :raises ValueError: If any row is out of bounds
+        """
+        if not rows:
+            return
+        xs = [row.get('xpos', 0) for row in rows]
+        zs = [row.get('zpos', 0) for row in rows]
+        if min(xs) < -7 or max(xs) > 7 or min(zs) < -7 or max(zs) > 7:
+            raise ValueError("xpos and/or zpos is out of bounds [-7,7]")
+
+        rotations = 0
+        for row in rows:
+            rotations |= row.get('rotation', 0)
+        if rotations & ~3:  # Any bit outside of 0b11 set in any rotation (including negatives) means out of [0,3]
+            raise ValueError("rotation is out of bounds [0,3]")
+
+    @classmethod
+    def bulk_insert(cls, session: Session, rows: list) -> list:
+        """
+        Insert many placeables (of this class) at once, without constructing the objects
+        The rows are checked with bulk_validate, but other than that no logic of __init__ is applied (eg seeding)
+        The INSERTs are batched (insertmanyvalues), with RETURNING to get the generated ids back in the same round-trip
+        :param session: The session to insert with
+        :param rows: A list of dicts, mapping the column (attribute) names to their values
+        :return: The placeable_ids of the inserted rows, in the same order as the given rows
+        :raises ValueError: If any row is out of bounds
+        """
+        cls.bulk_validate(rows)
+        return list(session.scalars(insert(cls).returning(cls.placeable_id, sort_by_parameter_order=True), rows))
 
 
     def create_task(self, endtime: DateTime):
@@ -79,21 +111,31 @@ class Placeable(current_app.db.Model):
         """
         Updates the placeable object new data
         Updating the id, island_id, task_id and type are not allowed
+        Only the fields present in data are assigned, so the other columns are left out of the UPDATE statement
         :param data: The new data
         :return:
         """
-        if data.get('x', self.xpos) < -7 or data.get('x', self.xpos) > 7:
+        if 'x' in data and not -7 <= data['x'] <= 7:
             raise ValueError("xpos is out of bounds [-7,7]")
-        if data.get('z', self.zpos) < -7 or data.get('z', self.zpos) > 7:
+        if 'z' in data and not -7 <= data['z'] <= 7:
             raise ValueError("zpos is out of bounds [-7,7]")
-        if data.get('rotation', self.rotation) < 0 or data.get('rotation', self.rotation) > 3:
+        if 'rotation' in data and not 0 <= data['rotation'] <= 3:
             raise ValueError("rotation is out of bounds [0,3]")
 
-        self.xpos = data.get('x', self.xpos)
-        self.zpos = data.get('z', self.zpos)
-        self.rotation = data.get('rotation', self.rotation)
+        if 'x' in data:
+            self.xpos = data['x']
+        if 'z' in data:
+            self.zpos = data['z']
+        if 'rotation' in data:
+            self.rotation = data['rotation']
+
 
+    __table_args__ = (
+        # Island loads select the placeables of an island, discriminated by type
+        Index('ix_placeable_island_type', 'island_id', 'type'),
+    )
 
     __mapper_args__ = {
-        'polymorphic_on': 'type'
+        'polymorphic_on': 'type',
+        'with_polymorphic': '*'  # Load the subclass columns in the same query instead of one SELECT per row
     }
@@ -31,7 +31,8 @@ class Prop(Placeable):
         :param data: The data to update the prop with
         """
         super().update(data)
-        self.prop_type = data.get('prop_type', self.prop_type)
+        if 'prop_type' in data:
+            self.prop_type = data['prop_type']
 
 
     __mapper_args__ = {
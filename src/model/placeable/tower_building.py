@@ -1,7 +1,7 @@
 from sqlalchemy import BigInteger, ForeignKey, Column, Enum as SqlEnum
 from sqlalchemy.orm import Mapped, mapped_column
 
-from src.model.enums import TowerBuildingType, BlueprintType
+from src.model.enums import TowerBuildingType, BlueprintType, TOWER_BUILDING_TYPES
 from src.model.placeable.building import Building
 
 
@@ -25,11 +25,11 @@ class TowerBuilding(Building):
         :param level: The level of the building
         :param rotation: The rotation of the building (0=North, 1=East, 2=South, 3=West)
         """
-        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.TOWER.value, rotation=rotation)
-        if not TowerBuildingType.has_value(tower_type):
+        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.TOWER, rotation=rotation)
+        if tower_type not in TOWER_BUILDING_TYPES:
             raise ValueError('Invalid tower_type')
 
-        self.tower_type = TowerBuildingType[tower_type.upper()]
+        self.tower_type = TOWER_BUILDING_TYPES[tower_type]
 
     def update(self, data: dict):
         """
@@ -40,11 +40,11 @@ class TowerBuilding(Building):
         :return:
         """
         super().update(data)
-        if not TowerBuildingType.has_value(data.get('tower_type', self.tower_type)):
-            raise ValueError('Invalid tower_type')
+        if 'tower_type' in data:
+            if data['tower_type'] not in TOWER_BUILDING_TYPES:
+                raise ValueError('Invalid tower_type')
 
-        # Ignore pycharm warning, it's wrong
-        self.tower_type = TowerBuildingType[data.get('tower_type', self.tower_type).upper()]
+            self.tower_type = TOWER_BUILDING_TYPES[data['tower_type']]
 
     __mapper_args__ = {
         'polymorphic_identity': 'tower_building'
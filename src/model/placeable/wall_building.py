@@ -16,7 +16,7 @@ class WallBuilding(Building):
         :param level: The level of the building
         :param rotation: The rotation of the building (0=North, 1=East, 2=South, 3=West)
         """
-        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.WALL.value, rotation=rotation)
+        super().__init__(island_id, xpos=x, zpos=z, level=level, blueprint_id=BlueprintType.WALL, rotation=rotation)
 
     def update(self, data: dict):
         """
@@ -1,25 +1,38 @@
 import datetime
+from collections import Counter, defaultdict
 from typing import List
 
-from flask import current_app
-from sqlalchemy import BigInteger, ForeignKey, Column, Integer, CheckConstraint, DateTime, func, PrimaryKeyConstraint
+from sqlalchemy import BigInteger, ForeignKey, Column, Integer, CheckConstraint, DateTime, func, PrimaryKeyConstraint, select, \
+    tuple_, Index, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
+from src.model import db
 from src.model.chat_message import ChatMessage
 from src.model.spell import Spell
 from src.model.user_profile import UserProfile
 
-friends_association_table = current_app.db.Table(
-    'friends_association', current_app.db.Model.metadata,
+friends_association_table = db.Table(
+    'friends_association', db.Model.metadata,
     Column('player_id', BigInteger, ForeignKey('player.user_profile_id', ondelete='CASCADE')),
     Column('friend_id', BigInteger, ForeignKey('player.user_profile_id', ondelete='CASCADE')),
     PrimaryKeyConstraint('player_id', 'friend_id'),
-    CheckConstraint('player_id != friend_id')
+    CheckConstraint('player_id != friend_id'),
+    # The primary key only serves lookups by player_id, this index serves the reverse (friend_id) direction
+    Index('ix_friends_reverse', 'friend_id', 'player_id')
 )
 
 
-class Player(current_app.db.Model):
+def _create_spell_association(map: dict) -> 'PlayerSpellAssociation':
+    """
+    Creator of the Player.spells association proxy
+    :param map: A dict with the player_id, spell_id and (optionally) slot of the new association
+    """
+    return PlayerSpellAssociation(player_id=map['player_id'], spell_id=map['spell_id'], slot=map.get('slot'))
+
+
+class Player(db.Model):
     """
     A Player is a profile for a user, containing information about their level, crystals, mana, and spells
     It has a one-to-one, weak relationship with the UserProfile (that holds more sensitive information such as username
@@ -38,16 +51,20 @@ class Player(current_app.db.Model):
     mana: Mapped[int] = Column(Integer, CheckConstraint('mana >= 0 AND mana <= 1000'), nullable=False, default=0)
     xp: Mapped[int] = Column(Integer, CheckConstraint('xp >= 0'), nullable=False, default=0)
     last_logout: Mapped[DateTime] = Column(DateTime, nullable=False, default=0)
-    last_login: Mapped[DateTime] = Column(DateTime, nullable=False, default=func.now())
+    last_login: Mapped[DateTime] = Column(DateTime, nullable=False, server_default=func.now())
 
     # entity_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('player_entity.entity_id'))
     # entity: Mapped["PlayerEntity"] = relationship("PlayerEntity", foreign_keys=[entity_id], back_populates="player")
-    entity: Mapped['PlayerEntity'] = relationship(back_populates="player", cascade="all, delete-orphan", uselist=False, lazy=False)
+    # Not eagerly loaded, most player lookups (eg friends) don't need it. Endpoints that do use selectinload(Player.entity)
+    entity: Mapped['PlayerEntity'] = relationship(back_populates="player", cascade="all, delete-orphan", uselist=False)
 
     # lazy=False means that the spells are loaded when the player is loaded
     # spells: Mapped[List[Spell]] = relationship(lazy=False, secondary=player_spell_association_table)
-    spells_association = relationship("PlayerSpellAssociation", cascade="all, delete-orphan")
-    spells: Mapped[List[Spell]] = association_proxy('spells_association', 'spell', creator=lambda map: PlayerSpellAssociation(player_id=map['player_id'], spell_id=map['spell_id'], slot=map['slot'] if 'slot' in map else None))
+    # The player_spells FKs are ON DELETE CASCADE, so let the database remove the associations of a deleted player
+    # Ordered by slot (unslotted spells last), backed by the ix_player_spells_player_slot index
+    spells_association = relationship("PlayerSpellAssociation", cascade="all, delete-orphan", passive_deletes=True,
+                                      order_by="PlayerSpellAssociation.slot")
+    spells: Mapped[List[Spell]] = association_proxy('spells_association', 'spell', creator=_create_spell_association)
 
     # The island of the player
     island: Mapped["Island"] = relationship("Island", back_populates="owner", single_parent=True, cascade="all, delete-orphan")
@@ -63,6 +80,12 @@ class Player(current_app.db.Model):
 
     # The player friends
     friends: Mapped[List["Player"]] = relationship("Player", secondary=friends_association_table, uselist=True, primaryjoin=user_profile_id == friends_association_table.c.player_id, secondaryjoin=user_profile_id == friends_association_table.c.friend_id)
+    # Read-only reverse direction (players that have this player as friend), served by the ix_friends_reverse index
+    # Writes always go through the association table directly (see update), so this never has to be kept in sync
+    friends_of: Mapped[List["Player"]] = relationship("Player", secondary=friends_association_table, uselist=True, viewonly=True, primaryjoin=user_profile_id == friends_association_table.c.friend_id, secondaryjoin=user_profile_id == friends_association_table.c.player_id)
+
+    # The amount of friends, kept in sync by _change_friends() so it can be read without counting the friends_association rows
+    friends_count: Mapped[int] = Column(Integer, CheckConstraint('friends_count >= 0', name='ck_player_friends_count'), nullable=False, server_default='0')
 
     # The player's match queue entry
     match_queue_entry: Mapped["MatchQueueEntry"] = relationship("MatchQueueEntry", back_populates="player", uselist=False, cascade="all, delete-orphan")
@@ -78,7 +101,7 @@ class Player(current_app.db.Model):
         :param mana: The amount of mana of the player. Should be >= 0
         :param xp: The amount of experience points of the player. Should be >= 0
         :param last_logout: The last logout time of the player
-        :param last_login: The last login time of the player
+        :param last_login: The last login time of the player. When None, the database fills in the current time on INSERT
         """
         if xp < 0:
             raise ValueError("XP must be greater than or equal to 0")
@@ -88,15 +111,14 @@ class Player(current_app.db.Model):
             raise ValueError("Mana must be greater than or equal to 0 and less than or equal to 1000")
         if last_logout is None:
             last_logout = datetime.datetime(1970,1,1)  # epoch
-        if last_login is None:
-            last_login = func.now()
 
         self.user_profile = user_profile
         self.crystals = crystals
         self.mana = mana
         self.xp = xp
         self.last_logout = last_logout
-        self.last_login = last_login
+        if last_login is not None:
+            self.last_login = last_login
 
     def update(self, data: dict):
         """
@@ -121,41 +143,102 @@ class Player(current_app.db.Model):
         if 'spells' in data:
             # ignore pyCharm warning about data types, it's wrong
             from src.resource.player import PlayerSpellAssociationSchema
+            by_id = {assoc.spell_id: assoc for assoc in self.spells_association}
             for spell in data.get('spells'):
                 PlayerSpellAssociationSchema(**spell)
+                spell["player_id"] = self.user_profile_id  # It MUST be the same, always
 
                 # Only slot is updatable
-                for assoc in self.spells_association:
-                    spell["player_id"] = self.user_profile_id  # It MUST be the same, always
-                    if assoc.spell_id == spell['spell_id']:
-                        assoc.slot = spell.get('slot', assoc.slot)
-                        break
+                assoc = by_id.get(spell['spell_id'])
+                if assoc is not None:
+                    assoc.slot = spell.get('slot', assoc.slot)
 
 
         if 'entity' in data:
             self.entity.update(data['entity'])
 
         if 'friends' in data:
-            new_friendset = []
+            new_ids = set(data.get('friends'))
+            if self.user_profile_id in new_ids:
+                raise ValueError("Feeling lonely? (You can't be friends with yourself)")
+
+            # Validate all friend ids in a single query
+            found_ids = set(db.session.scalars(select(Player.user_profile_id).where(Player.user_profile_id.in_(new_ids))))
             for friend_id in data.get('friends'):
-                if friend_id == self.user_profile_id:
-                    raise ValueError("Feeling lonely? (You can't be friends with yourself)")
-                friend = Player.query.get(friend_id)
-                if friend is None:
+                if friend_id not in found_ids:
                     raise ValueError(f"Friend {friend_id} not found")
-                new_friendset.append(friend)
-                friend.friends.append(self)  # add the player to the friend's friend list
 
-            # Update the friends their relation to us as well, as the friends relation is a bidirectional many-to-many relationship
-            diff = set(self.friends) - set(new_friendset)
-            if diff:
-                for friend in diff:
-                    friend.friends.remove(self)  # remove the player from the friend's friend list
+            old_ids = set(db.session.scalars(select(friends_association_table.c.friend_id)
+                                             .where(friends_association_table.c.player_id == self.user_profile_id)))
+            to_add = new_ids - old_ids
+            to_remove = old_ids - new_ids
+            self._change_friends(to_add, to_remove)
 
-            self.friends = new_friendset
+    def add_friend(self, friend_id: int):
+        """
+        Make this player and the given player friends (in both directions), eg when a friend request is accepted
+        :param friend_id: The id of the player to befriend
+        :return:
+        """
+        self._change_friends({friend_id}, set())
 
+    def _change_friends(self, to_add: set, to_remove: set):
+        """
+        Add & remove friends of this player, keeping the friends_count of all involved players in sync
+        Friends are always written through this method, never through the friends relationship (which bypasses the count)
+        :param to_add: The ids of the players to befriend
+        :param to_remove: The ids of the players to unfriend
+        :return:
+        """
+        # The friends relation is a bidirectional many-to-many relationship, so both directions are written
+        # This is done directly on the association table, without loading the friends (and their friend lists)
+        # The friends_count of every player whose rows actually changed is adjusted by the amount of changed rows
+        deltas = Counter()
+        if to_add:
+            rows = [{'player_id': self.user_profile_id, 'friend_id': friend_id} for friend_id in to_add] + \
+                   [{'player_id': friend_id, 'friend_id': self.user_profile_id} for friend_id in to_add]
+            deltas.update(db.session.scalars(insert(friends_association_table).on_conflict_do_nothing()
+                                             .returning(friends_association_table.c.player_id), rows))
+        if to_remove:
+            pairs = [(self.user_profile_id, friend_id) for friend_id in to_remove] + \
+                    [(friend_id, self.user_profile_id) for friend_id in to_remove]
+            deltas.subtract(db.session.scalars(friends_association_table.delete().where(
+                tuple_(friends_association_table.c.player_id, friends_association_table.c.friend_id).in_(pairs))
+                                               .returning(friends_association_table.c.player_id)))
+
+        # One UPDATE per distinct delta (usually 3: this player, the added friends & the removed friends)
+        ids_by_delta = defaultdict(list)
+        for player_id, delta in deltas.items():
+            if delta:
+                ids_by_delta[delta].append(player_id)
+        for delta, player_ids in ids_by_delta.items():
+            db.session.execute(update(Player).where(Player.user_profile_id.in_(player_ids))
+                               .values(friends_count=Player.friends_count + delta)
+                               .execution_options(synchronize_session=False))
+
+        changed_ids = to_add | to_remove
+        if changed_ids:
+            # The friend lists loaded in this session are stale now
+            db.session.expire(self, ['friends', 'friends_of', 'friends_count'])
+            for obj in list(db.session.identity_map.values()):
+                if isinstance(obj, Player) and obj.user_profile_id in changed_ids:
+                    db.session.expire(obj, ['friends', 'friends_of', 'friends_count'])
+
+    def release_friends_count(self):
+        """
+        Decrement the friends_count of every friend of this player
+        Call this before deleting the player, as the friends_association rows are then removed by ON DELETE CASCADE
+        (which bypasses update())
+        :return:
+        """
+        db.session.execute(update(Player)
+                           .where(Player.user_profile_id.in_(select(friends_association_table.c.player_id)
+                                                             .where(friends_association_table.c.friend_id == self.user_profile_id)))
+                           .values(friends_count=Player.friends_count - 1)
+                           .execution_options(synchronize_session=False))
 
-class PlayerSpellAssociation(current_app.db.Model):
+
+class PlayerSpellAssociation(db.Model):
     """
     Represents the relationship between a player and a spell with a slot as relationship attribute
     """
@@ -168,6 +251,11 @@ class PlayerSpellAssociation(current_app.db.Model):
     player: Mapped[Player] = relationship("Player", back_populates="spells_association")
     spell: Mapped[Spell] = relationship("Spell")
 
+    __table_args__ = (
+        # Serves loading the spells of a player in slot order
+        Index('ix_player_spells_player_slot', 'player_id', 'slot'),
+    )
+
     def __init__(self, player_id: int = None, spell_id: int = None, slot: int = None, **kwargs):
         # leave **kwargs in case of future use
         self.player_id = player_id
@@ -1,9 +1,16 @@
-from flask import current_app
-from sqlalchemy import Integer, Column, ForeignKey, CheckConstraint
-from sqlalchemy.orm import relationship, Mapped
+from typing import Optional
 
+from sqlalchemy import Integer, Column, ForeignKey, CheckConstraint, select, update, Row
+from sqlalchemy.orm import relationship, Mapped, Session
 
-class PlayerStats(current_app.db.Model):
+from src.model import db
+
+# The statistics fields of PlayerStats, all of them are updatable
+_STAT_FIELDS = ('player_kills', 'player_deaths', 'minions_killed', 'damage_dealt', 'damage_taken', 'mana_spent',
+                'spell_casts', 'gems_won', 'gems_lost', 'games_played', 'games_won')
+
+
+class PlayerStats(db.Model):
     """
     A PlayerStats object is a collection of multiplayer statistics for a player
     """
@@ -40,22 +47,28 @@ class PlayerStats(current_app.db.Model):
         self.games_won = games_won
 
 
+    @staticmethod
+    def fetch_raw(session: Session, player_id: int) -> Optional[Row]:
+        """
+        Fetch the statistics of a player as a plain (read-only) row, without materializing a PlayerStats object
+        The row has the same attribute names as PlayerStats, so it can be serialized the same way
+        Use PlayerStats.query.get() when the statistics have to be updated
+        :param session: The session to execute the query with
+        :param player_id: The id of the player
+        :return: The row, or None if the player has no statistics
+        """
+        return session.execute(select(*PlayerStats.__table__.columns).where(PlayerStats.player_id == player_id)).one_or_none()
+
+
     def update(self, data):
         """
         Update the player statistics with new data
         All fields are updatable
+        The changed fields are written in a single UPDATE statement, the updated attributes are expired and reloaded on access
         :param data:
         :return:
         """
-        self.player_kills = data.get('player_kills', self.player_kills)
-        self.player_deaths = data.get('player_deaths', self.player_deaths)
-        self.minions_killed = data.get('minions_killed', self.minions_killed)
-        self.damage_dealt = data.get('damage_dealt', self.damage_dealt)
-        self.damage_taken = data.get('damage_taken', self.damage_taken)
-        self.mana_spent = data.get('mana_spent', self.mana_spent)
-        self.spell_casts = data.get('spell_casts', self.spell_casts)
-        self.gems_won = data.get('gems_won', self.gems_won)
-        self.gems_lost = data.get('gems_lost', self.gems_lost)
-        self.games_played = data.get('games_played', self.games_played)
-        self.games_won = data.get('games_won', self.games_won)
-
+        changed = {key: data[key] for key in _STAT_FIELDS if key in data}
+        if changed:
+            db.session.execute(update(PlayerStats).where(PlayerStats.player_id == self.player_id).values(**changed))
+            db.session.expire(self, list(changed))
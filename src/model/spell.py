@@ -1,10 +1,11 @@
-from flask import current_app
 from sqlalchemy import Integer, Column, String, ForeignKey
 from sqlalchemy.orm import Mapped
 
+from src.model import db
 
 
-class Spell(current_app.db.Model):
+
+class Spell(db.Model):
     """
     A spell in the game. The set of spells is expected to be static and not change often.
     Info such as description & mana cost are stored in the client side code as these are not expected to change
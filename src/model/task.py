@@ -1,11 +1,12 @@
 import datetime
 
-from flask import current_app
-from sqlalchemy import BigInteger, DateTime, Column, func, String, Boolean, ForeignKey
+from sqlalchemy import BigInteger, DateTime, Column, func, String, Boolean, ForeignKey, Index, CheckConstraint
 from sqlalchemy.orm import mapped_column, Mapped, declared_attr, relationship
 
+from src.model import db
 
-class Task(current_app.db.Model):
+
+class Task(db.Model):
     """
     A Task is an object to keep track of running 'single task'. Periodic tasks are handeled differently, see SCHEDULING.md for more information.
     This class has a polymorphic relationship (not total!) with other tasks, such as BuildingUpgradeTask
@@ -16,7 +17,7 @@ class Task(current_app.db.Model):
 
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
-    starttime: Mapped[DateTime] = Column(DateTime(timezone=True), nullable=False)
+    starttime: Mapped[DateTime] = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     endtime: Mapped[DateTime] = Column(DateTime(timezone=True), nullable=False)
 
     type: Mapped[str] = Column(String(32), nullable=False) # Keep track of polymorphic identities
@@ -28,15 +29,18 @@ class Task(current_app.db.Model):
         return relationship("Island", back_populates="tasks")
 
     # The building that the task is associated with, may be None
-    working_building: Mapped['Placeable'] = relationship('Placeable', back_populates='task', uselist=False, cascade="save-update, merge")
+    # The placeable.task_id FK is ON DELETE SET NULL, so deleting a task doesn't have to load its building to unlink it
+    working_building: Mapped['Placeable'] = relationship('Placeable', back_populates='task', uselist=False, cascade="save-update, merge", passive_deletes=True)
 
 
-    def __init__(self, endtime: DateTime, island_id: int = None, working_building: 'Building' = None):
+    def __init__(self, endtime: DateTime, island_id: int = None, working_building: 'Building' = None, starttime: DateTime = None):
         """
         Initialize the task object
         :param endtime: The time when the task should end
+        :param starttime: The time when the task started. When None, the database fills in the current time on INSERT
         """
-        self.starttime = datetime.datetime.now(tz=endtime.tzinfo)
+        if starttime is not None:
+            self.starttime = starttime
         self.endtime = endtime
         self.island_id = island_id
         self.working_building = working_building
@@ -52,15 +56,37 @@ class Task(current_app.db.Model):
         self.working_building = data.get('working_building', self.working_building)
 
 
-    def is_over(self) -> bool:
+    def is_over(self, now: datetime.datetime = None) -> bool:
         """
         Check if the task is done
+        :param now: The current time. When checking many tasks, pass the same (timezone aware) time to all of them instead
+        of letting each call create its own
         :return: True if the task is done, False otherwise
         """
-        return self.endtime < datetime.datetime.now(tz=self.endtime.tzinfo)
+        if now is None:
+            now = datetime.datetime.now(tz=self.endtime.tzinfo)
+        return self.endtime < now
+
 
+    __table_args__ = (
+        # The task list filters on island_id and (for is_over) on endtime, ordered by endtime
+        Index('ix_task_island_endtime', 'island_id', 'endtime'),
+        # Fuse tasks (single table inheritance, see FuseTask) require a non-negative crystal_amount, see migration e7c2b9f41a08
+        CheckConstraint("type <> 'fuse_task' OR (crystal_amount IS NOT NULL AND crystal_amount >= 0)", name='ck_task_crystal_amount'),
+    )
 
     __mapper_args__ = {
         'polymorphic_identity': 'task',
-        'polymorphic_on': type
-    }
\ No newline at end of file
+        'polymorphic_on': type,
+        'with_polymorphic': '*'  # Load the subclass columns in the same query instead of one SELECT per row
+    }
+
+
+def is_over_batch(tasks: list) -> list:
+    """
+    Check for each task if it is done, using a single 'now' for all of them
+    :param tasks: The tasks to check
+    :return: A list of booleans, True for each task that is done
+    """
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    return [task.is_over(now) for task in tasks]
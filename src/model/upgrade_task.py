@@ -18,7 +18,8 @@ class BuildingUpgradeTask(Task):
     to_level: Mapped[int] = Column(SmallInteger, CheckConstraint('to_level >= 0'), nullable=False)
     used_crystals: Mapped[int] = Column(Integer, CheckConstraint('used_crystals >= 0'), nullable=False)
 
-    building_minions: Mapped[List["BuilderMinion"]] = relationship(back_populates="builds_on", uselist=True)
+    # Serialized with every upgrade task, selectin loads the minions of a whole list of tasks in one extra query
+    building_minions: Mapped[List["BuilderMinion"]] = relationship(back_populates="builds_on", uselist=True, lazy='selectin')
 
 
     def __init__(self, endtime: DateTime, working_building: "Building", to_level: int, used_crystals: int, island_id: int = None):
@@ -30,10 +31,9 @@ class BuildingUpgradeTask(Task):
         :param used_crystals: The amount of crystals used for the upgrade, will be rewarded back to the player if the task is cancelled
         """
         super().__init__(endtime, island_id or working_building.island_id, working_building=working_building)
-        if to_level < 0:
-            raise ValueError("Level must be greater than or equal to 0")
-        if used_crystals < 0:
-            raise ValueError("Used crystals must be greater than or equal to 0")
+        # The CHECK constraints are authoritative, this only fails early. The OR of two ints is negative iff one of them is
+        if (to_level | used_crystals) < 0:
+            raise ValueError("Level and used crystals must be greater than or equal to 0")
 
         self.to_level = to_level
         self.used_crystals = used_crystals
@@ -1,11 +1,11 @@
-from flask import current_app
 from sqlalchemy import String, BigInteger, Column, Boolean
 from sqlalchemy.orm import Mapped, relationship, mapped_column
 
+from src.model import db
 from src.model.credentials import Credentials, PasswordCredentials
 
 
-class UserProfile(current_app.db.Model):
+class UserProfile(db.Model):
     """
     A user profile is a representation of a user in the database
     It contains information about the user, such as their name, their credentials, and their player object
@@ -19,7 +19,8 @@ class UserProfile(current_app.db.Model):
     username: Mapped[str] = Column(String(255), unique=True)
     admin: Mapped[bool] = Column(Boolean(), default=False, server_default="false", nullable=False)
 
-    credentials: Mapped[Credentials] = relationship(back_populates="user_profile", uselist=False, cascade="all, delete-orphan")
+    # One-to-one, and read right after loading the profile when authenticating (uses_oauth2, authenticate), so join it in
+    credentials: Mapped[Credentials] = relationship(back_populates="user_profile", uselist=False, cascade="all, delete-orphan", lazy='joined')
 
     def __init__(self, username: str, firstname: str, lastname: str, credentials: Credentials, admin: bool = False):
         """
@@ -1,11 +1,60 @@
-from flask import current_app
-from sqlalchemy import Column, BigInteger, ForeignKey, SmallInteger, Boolean, String, CheckConstraint
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Column, BigInteger, ForeignKey, SmallInteger, Boolean, String, CheckConstraint, insert
+from sqlalchemy.orm import Mapped, mapped_column, relationship, Session
 
+from src.model import db
 from src.model.player import Player
 
+# The numeric settings, with their (inclusive) allowed range
+_RANGED_FIELDS = (('audio_volume', 0, 100), ('performance', 0, 2), ('selected_cursor', 0, 3),
+                  ('horz_sensitivity', 0, 100), ('vert_sensitivity', 0, 100))
 
-class UserSettings(current_app.db.Model):
+# The keybind settings, each action has a key (code) & value (symbol)
+_KEYBIND_FIELDS = tuple(f'{action}_{part}'
+                        for action in ('move_fwd', 'move_bkwd', 'move_left', 'move_right', 'jump', 'interact', 'eat',
+                                       'chat', 'slot_1', 'slot_2', 'slot_3', 'slot_4', 'slot_5', 'sprint')
+                        for part in ('key', 'val'))
+
+# All settings that can be set through __init__ and update
+_FIELDS = tuple(name for name, _, _ in _RANGED_FIELDS) + _KEYBIND_FIELDS
+_FIELD_SET = frozenset(_FIELDS)
+
+
+def _check_ranges(values: dict) -> None:
+    """
+    Check the numeric settings that are present in values against their allowed range
+    :param values: The settings, by name
+    :raises ValueError: If a setting is out of its range
+    """
+    for name, low, high in _RANGED_FIELDS:
+        if name in values and not low <= values[name] <= high:
+            raise ValueError(f"{name} must be in the range [{low},{high}]")
+
+
+# All keybind columns share the same type instance
+_KEYBIND_TYPE = String(12)
+
+# The keybind columns are deferred (not loaded by default) in this group, use undefer_group(KEYBINDS_GROUP) to load them
+KEYBINDS_GROUP = 'keybinds'
+
+
+def _keybind_key(default: str) -> Mapped[str]:
+    """
+    Create the (deferred) column for the key (code) of a keybind
+    :param default: The default key code
+    :return: The column
+    """
+    return mapped_column(_KEYBIND_TYPE, nullable=False, default=default, deferred=True, deferred_group=KEYBINDS_GROUP)
+
+
+def _keybind_val() -> Mapped[str]:
+    """
+    Create the (deferred) column for the value (symbol) of a keybind
+    :return: The column
+    """
+    return mapped_column(_KEYBIND_TYPE, nullable=True, deferred=True, deferred_group=KEYBINDS_GROUP)
+
+
+class UserSettings(db.Model):
     """
     UserSettings contains all the settings for a player
     This includes audio settings, keybinds, etc.
@@ -25,139 +74,83 @@ class UserSettings(current_app.db.Model):
     vert_sensitivity: Mapped[int] = Column(SmallInteger, CheckConstraint("vert_sensitivity >= 0 AND vert_sensitivity <= 100"), nullable=False, default=50)
 
     # Keybinds
-    move_fwd_key: Mapped[str] = Column(String(12), nullable=False, default='KeyW')
-    move_fwd_val: Mapped[str] = Column(String(12), nullable=True)
-    move_bkwd_key: Mapped[str] = Column(String(12), nullable=False, default='KeyS')
-    move_bkwd_val: Mapped[str] = Column(String(12), nullable=True)
-    move_left_key: Mapped[str] = Column(String(12), nullable=False, default='KeyA')
-    move_left_val: Mapped[str] = Column(String(12), nullable=True)
-    move_right_key: Mapped[str] = Column(String(12), nullable=False, default='KeyD')
-    move_right_val: Mapped[str] = Column(String(12), nullable=True)
-    jump_key: Mapped[str] = Column(String(12), nullable=False, default='Space')
-    jump_val: Mapped[str] = Column(String(12), nullable=True)
-    interact_key: Mapped[str] = Column(String(12), nullable=False, default='KeyE')
-    interact_val: Mapped[str] = Column(String(12), nullable=True)
-    eat_key: Mapped[str] = Column(String(12), nullable=False, default='KeyQ')
-    eat_val: Mapped[str] = Column(String(12), nullable=True)
-    chat_key: Mapped[str] = Column(String(12), nullable=False, default='KeyC')
-    chat_val: Mapped[str] = Column(String(12), nullable=True)
-    slot_1_key: Mapped[str] = Column(String(12), nullable=False, default='Digit1')
-    slot_1_val: Mapped[str] = Column(String(12), nullable=True)
-    slot_2_key: Mapped[str] = Column(String(12), nullable=False, default='Digit2')
-    slot_2_val: Mapped[str] = Column(String(12), nullable=True)
-    slot_3_key: Mapped[str] = Column(String(12), nullable=False, default='Digit3')
-    slot_3_val: Mapped[str] = Column(String(12), nullable=True)
-    slot_4_key: Mapped[str] = Column(String(12), nullable=False, default='Digit4')
-    slot_4_val: Mapped[str] = Column(String(12), nullable=True)
-    slot_5_key: Mapped[str] = Column(String(12), nullable=False, default='Digit5')
-    slot_5_val: Mapped[str] = Column(String(12), nullable=True)
-    sprint_key: Mapped[str] = Column(String(12), nullable=False, default='ShiftLeft')
-    sprint_val: Mapped[str] = Column(String(12), nullable=True)
-
-    def __init__(self, player_id: int, audio_volume: int = 100, performance: int = 2, selected_cursor: int = 0, horz_sensitivity: int = 50, vert_sensitivity: int = 50,
-                    move_fwd_key: str = 'KeyW', move_fwd_val: str = None, move_bkwd_key: str = 'KeyS', move_bkwd_val: str = None, move_left_key: str = 'KeyA', move_left_val: str = None,
-                    move_right_key: str = 'KeyD', move_right_val: str = None, jump_key: str = 'Space', jump_val: str = None, interact_key: str = 'KeyE', interact_val: str = None,
-                    eat_key: str = 'KeyQ', eat_val: str = None, chat_key: str = 'KeyC', chat_val: str = None, slot_1_key: str = 'Digit1', slot_1_val: str = None, slot_2_key: str = 'Digit2',
-                    slot_2_val: str = None, slot_3_key: str = 'Digit3', slot_3_val: str = None, slot_4_key: str = 'Digit4', slot_4_val: str = None, slot_5_key: str = 'Digit5', slot_5_val: str = None,
-                    sprint_key: str = 'ShiftLeft', sprint_val: str = None):
+    move_fwd_key: Mapped[str] = _keybind_key('KeyW')
+    move_fwd_val: Mapped[str] = _keybind_val()
+    move_bkwd_key: Mapped[str] = _keybind_key('KeyS')
+    move_bkwd_val: Mapped[str] = _keybind_val()
+    move_left_key: Mapped[str] = _keybind_key('KeyA')
+    move_left_val: Mapped[str] = _keybind_val()
+    move_right_key: Mapped[str] = _keybind_key('KeyD')
+    move_right_val: Mapped[str] = _keybind_val()
+    jump_key: Mapped[str] = _keybind_key('Space')
+    jump_val: Mapped[str] = _keybind_val()
+    interact_key: Mapped[str] = _keybind_key('KeyE')
+    interact_val: Mapped[str] = _keybind_val()
+    eat_key: Mapped[str] = _keybind_key('KeyQ')
+    eat_val: Mapped[str] = _keybind_val()
+    chat_key: Mapped[str] = _keybind_key('KeyC')
+    chat_val: Mapped[str] = _keybind_val()
+    slot_1_key: Mapped[str] = _keybind_key('Digit1')
+    slot_1_val: Mapped[str] = _keybind_val()
+    slot_2_key: Mapped[str] = _keybind_key('Digit2')
+    slot_2_val: Mapped[str] = _keybind_val()
+    slot_3_key: Mapped[str] = _keybind_key('Digit3')
+    slot_3_val: Mapped[str] = _keybind_val()
+    slot_4_key: Mapped[str] = _keybind_key('Digit4')
+    slot_4_val: Mapped[str] = _keybind_val()
+    slot_5_key: Mapped[str] = _keybind_key('Digit5')
+    slot_5_val: Mapped[str] = _keybind_val()
+    sprint_key: Mapped[str] = _keybind_key('ShiftLeft')
+    sprint_val: Mapped[str] = _keybind_val()
+
+    def __init__(self, player_id: int, **settings):
         """
         Initialize the UserSettings object
+        :param player_id: The id of the player these settings belong to
+        :param settings: The settings (see _FIELDS) that differ from the defaults, by name
+        :raises TypeError: If an unknown setting is given
         """
-        if audio_volume < 0 or audio_volume > 100:
-            raise ValueError("audio_volume must be in the range [0,100]")
-        if performance < 0 or performance > 2:
-            raise ValueError("performance must be in the range [0,2]")
-        if selected_cursor < 0 or selected_cursor > 3:
-            raise ValueError("selected_cursor must be in the range [0,3]")
-        if horz_sensitivity < 0 or horz_sensitivity > 100:
-            raise ValueError("horz_sensitivity must be in the range [0,100]")
-        if vert_sensitivity < 0 or vert_sensitivity > 100:
-            raise ValueError("vert_sensitivity must be in the range [0,100]")
+        unknown = settings.keys() - _DEFAULTS.keys()
+        if unknown:
+            raise TypeError(f"Unknown setting(s): {', '.join(sorted(unknown))}")
+
+        values = {**_DEFAULTS, **settings}
+        _check_ranges(values)
 
         self.player_id = player_id
-        self.audio_volume = audio_volume
-        self.performance = performance
-        self.selected_cursor = selected_cursor
-        self.horz_sensitivity = horz_sensitivity
-        self.vert_sensitivity = vert_sensitivity
-
-        self.move_fwd_key = move_fwd_key
-        self.move_fwd_val = move_fwd_val
-        self.move_bkwd_key = move_bkwd_key
-        self.move_bkwd_val = move_bkwd_val
-        self.move_left_key = move_left_key
-        self.move_left_val = move_left_val
-        self.move_right_key = move_right_key
-        self.move_right_val = move_right_val
-        self.jump_key = jump_key
-        self.jump_val = jump_val
-        self.interact_key = interact_key
-        self.interact_val = interact_val
-        self.eat_key = eat_key
-        self.eat_val = eat_val
-        self.chat_key = chat_key
-        self.chat_val = chat_val
-        self.slot_1_key = slot_1_key
-        self.slot_1_val = slot_1_val
-        self.slot_2_key = slot_2_key
-        self.slot_2_val = slot_2_val
-        self.slot_3_key = slot_3_key
-        self.slot_3_val = slot_3_val
-        self.slot_4_key = slot_4_key
-        self.slot_4_val = slot_4_val
-        self.slot_5_key = slot_5_key
-        self.slot_5_val = slot_5_val
-        self.sprint_key = sprint_key
-        self.sprint_val = sprint_val
+        for name, value in values.items():
+            setattr(self, name, value)
+
+
+    @classmethod
+    def bulk_create_defaults(cls, session: Session, player_ids: list, batch_size: int = 10_000) -> None:
+        """
+        Create the default settings for many players at once, without constructing the objects
+        The rows are inserted in batches of batch_size rows, each batch is a single (multi-row) INSERT
+        :param session: The session to insert with
+        :param player_ids: The ids of the players to create the settings for
+        :param batch_size: The maximum amount of rows per INSERT statement
+        """
+        for start in range(0, len(player_ids), batch_size):
+            rows = [{'player_id': player_id, **_DEFAULTS} for player_id in player_ids[start:start + batch_size]]
+            session.execute(insert(cls), rows)
 
 
     def update(self, data: dict):
         """
         Update the UserSettings with the given data
+        Only the settings that are present in data and differ from the current value are assigned
         :param data: The data to update the UserSettings with
         """
-        if data.get('audio_volume', self.audio_volume) < 0 or data.get('audio_volume', self.audio_volume) > 100:
-            raise ValueError("audio_volume must be in the range [0,100]")
-        if data.get('performance', self.performance) < 0 or data.get('performance', self.performance) > 2:
-            raise ValueError("performance must be in the range [0,2]")
-        if data.get('selected_cursor', self.selected_cursor) < 0 or data.get('selected_cursor', self.selected_cursor) > 3:
-            raise ValueError("selected_cursor must be in the range [0,3]")
-        if data.get('horz_sensitivity', self.horz_sensitivity) < 0 or data.get('horz_sensitivity', self.horz_sensitivity) > 100:
-            raise ValueError("horz_sensitivity must be in the range [0,100]")
-        if data.get('vert_sensitivity', self.vert_sensitivity) < 0 or data.get('vert_sensitivity', self.vert_sensitivity) > 100:
-            raise ValueError("vert_sensitivity must be in the range [0,100]")
-
-        self.audio_volume = data.get('audio_volume', self.audio_volume)
-        self.performance = data.get('performance', self.performance)
-        self.selected_cursor = data.get('selected_cursor', self.selected_cursor)
-        self.horz_sensitivity = data.get('horz_sensitivity', self.horz_sensitivity)
-        self.vert_sensitivity = data.get('vert_sensitivity', self.vert_sensitivity)
-
-        self.move_fwd_key = data.get('move_fwd_key', self.move_fwd_key)
-        self.move_fwd_val = data.get('move_fwd_val', self.move_fwd_val)
-        self.move_bkwd_key = data.get('move_bkwd_key', self.move_bkwd_key)
-        self.move_bkwd_val = data.get('move_bkwd_val', self.move_bkwd_val)
-        self.move_left_key = data.get('move_left_key', self.move_left_key)
-        self.move_left_val = data.get('move_left_val', self.move_left_val)
-        self.move_right_key = data.get('move_right_key', self.move_right_key)
-        self.move_right_val = data.get('move_right_val', self.move_right_val)
-        self.jump_key = data.get('jump_key', self.jump_key)
-        self.jump_val = data.get('jump_val', self.jump_val)
-        self.interact_key = data.get('interact_key', self.interact_key)
-        self.interact_val = data.get('interact_val', self.interact_val)
-        self.eat_key = data.get('eat_key', self.eat_key)
-        self.eat_val = data.get('eat_val', self.eat_val)
-        self.chat_key = data.get('chat_key', self.chat_key)
-        self.chat_val = data.get('chat_val', self.chat_val)
-        self.slot_1_key = data.get('slot_1_key', self.slot_1_key)
-        self.slot_1_val = data.get('slot_1_val', self.slot_1_val)
-        self.slot_2_key = data.get('slot_2_key', self.slot_2_key)
-        self.slot_2_val = data.get('slot_2_val', self.slot_2_val)
-        self.slot_3_key = data.get('slot_3_key', self.slot_3_key)
-        self.slot_3_val = data.get('slot_3_val', self.slot_3_val)
-        self.slot_4_key = data.get('slot_4_key', self.slot_4_key)
-        self.slot_4_val = data.get('slot_4_val', self.slot_4_val)
-        self.slot_5_key = data.get('slot_5_key', self.slot_5_key)
-        self.slot_5_val = data.get('slot_5_val', self.slot_5_val)
-        self.sprint_key = data.get('sprint_key', self.sprint_key)
-        self.sprint_val = data.get('sprint_val', self.sprint_val)
+        # Walk the (usually small) data once, instead of looking up every setting in it
+        changes = {name: value for name, value in data.items() if name in _FIELD_SET}
+        _check_ranges(changes)
+
+        for name, value in changes.items():
+            if value != getattr(self, name):
+                setattr(self, name, value)
+
+
+# The default of each setting, taken from the column definitions so they are only declared once
+_DEFAULTS = {name: UserSettings.__table__.c[name].default.arg if UserSettings.__table__.c[name].default is not None else None
+             for name in _FIELDS}
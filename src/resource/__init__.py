@@ -1,27 +1,53 @@
+import importlib
 import logging
+from functools import lru_cache
 from typing import Optional, Tuple
 
-from flask import Flask,  current_app
-from flask_jwt_extended import get_jwt_identity
+from flask import Flask,  current_app, g
+from flask_jwt_extended import get_jwt_identity, get_jwt
 from flask_restful_swagger_3 import Api
 from markupsafe import escape
 from deepmerge import always_merger
+from sqlalchemy import select, bindparam, Select
 
+from src.model import db
 from src.schema import ErrorSchema
+from src.service.auth_service import ADMIN_CLAIM
 
 openapi_dict = dict()
+_openapi_frozen = False
+# The openapi objects of the resource blueprints, merged into openapi_dict at the end of attach_resources
+_pending_specs = []
+
+def freeze_openapi() -> None:
+    """
+    End the build phase of the openapi_dict, call this once all routes & resources are attached
+    Afterwards, add_swagger() and add_endpoint_to_swagger() raise instead of changing the (already served) documentation
+    Note: the openapi_dict itself stays a regular dict, as the swagger blueprint needs a plain (JSON serializable) dict
+    :return: None
+    """
+    global _openapi_frozen
+    _openapi_frozen = True
+
+def _check_openapi_not_frozen() -> None:
+    """
+    Check that the openapi_dict is still in its build phase
+    :raises RuntimeError: If freeze_openapi() has been called already
+    """
+    if _openapi_frozen:
+        raise RuntimeError('The OpenAPI documentation is frozen, attach endpoints during app setup (attach_resources)')
 
 def add_swagger(api: Api) -> None:
     """
     Add swagger documentation to the global openapi_dict
     This is a hack because the flask_restful_swagger_3 library does not work with multiple blueprints
     So we merge the swagger openapi dictionary from each blueprint into a single dictionary
+    The merge itself happens once all resources are attached (see attach_resources)
     :param api: The api object with the swagger documentation (in json)
     :return: None
     """
-    # Add swagger documentation by deep-merging it into the openAPI object
-    global openapi_dict
-    always_merger.merge(openapi_dict, api.open_api_object)
+    _check_openapi_not_frozen()
+    _pending_specs.append(api.open_api_object)
 
 def add_endpoint_to_swagger(path: str, method: str or list[str], tags: list, summary: str, description: str, parameters: list[dict], response_schemas: dict) -> None:
     """
@@ -35,32 +61,61 @@ def add_endpoint_to_swagger(path: str, method: str or list[str], tags: list, sum
     :param response_schemas: The response schemas of the endpoint, mapped by status code
     :return: None
     """
-    global openapi_dict
-    if 'paths' not in openapi_dict:
-        openapi_dict['paths'] = dict()
-    if path not in openapi_dict['paths']:
-        openapi_dict['paths'][path] = dict()
-
-    methods = method if isinstance(method, list) else [method]
-    for method in methods:
-        openapi_dict['paths'][path][method] = {
-            "tags": tags,
-            "summary": summary,
-            "description": description,
-            "parameters": parameters,
-
-        }
-
-        openapi_dict['paths'][path][method]['responses'] = dict()
-        for status_code, response_schema in response_schemas.items():
-            openapi_dict['paths'][path][method]['responses'][status_code] = {
+    _check_openapi_not_frozen()
+    paths = openapi_dict.setdefault('paths', dict())
+    path_item = paths.setdefault(path, dict())
+
+    # The operation is the same for each method, so build it (and its responses) once
+    operation = {
+        "tags": tags,
+        "summary": summary,
+        "description": description,
+        "parameters": parameters,
+        "responses": {
+            status_code: {
                 "description": response_schema['description'],
                 "content": {
                     "application/json": {
                         "schema": response_schema['schema']
                     }
                 }
-            }
+            } for status_code, response_schema in response_schemas.items()
+        }
+    }
+
+    methods = method if isinstance(method, list) else [method]
+    for method in methods:
+        path_item[method] = operation
+
+
+# The resource modules, in the order their endpoints are attached. Each module has an attach_resource(app) function
+_RESOURCE_MODULES = (
+    'src.resource.player',
+    'src.resource.user_profile',
+    'src.resource.spell',
+    'src.resource.island',
+    'src.resource.builder_minion',
+    'src.resource.placeable.mine_building',
+    'src.resource.placeable.altar_building',
+    'src.resource.placeable.fuse_table_building',
+    'src.resource.placeable.warrior_hut_building',
+    'src.resource.placeable.wall_building',
+    'src.resource.placeable.tower_building',
+    'src.resource.gems',
+    'src.resource.blueprint',
+    'src.resource.task',
+    'src.resource.upgrade_task',
+    'src.resource.user_settings',
+    'src.resource.placeable.prop',
+    'src.resource.chat_message',
+    'src.resource.placeable.placeable',
+    'src.resource.entity',
+    'src.resource.time',
+    'src.resource.match_queue',
+    'src.resource.friend_request',
+    'src.resource.player_stats',
+    'src.resource.fuse_task',
+)
 
 
 def attach_resources(app: Flask) -> None:
@@ -70,82 +125,95 @@ def attach_resources(app: Flask) -> None:
     :return: None
     """
     # This will automatically create a RESTFUL API endpoint for each Resource
-    import src.resource.player as player_module
-    import src.resource.user_profile as user_profile_module
-    import src.resource.spell as spell_module
-    import src.resource.island as island_module
-    import src.resource.builder_minion as builder_minion_module
-    import src.resource.placeable.mine_building as mine_building_module
-    import src.resource.placeable.altar_building as altar_building_module
-    import src.resource.placeable.fuse_table_building as fuse_table_building_module
-    import src.resource.placeable.warrior_hut_building as warrior_hut_building_module
-    import src.resource.placeable.tower_building as tower_building_module
-    import src.resource.placeable.wall_building as wall_building_module
-    import src.resource.gems as gems_module
-    import src.resource.blueprint as blueprint_module
-    import src.resource.task as task_module
-    import src.resource.upgrade_task as upgrade_task_module
-    import src.resource.user_settings as user_settings_module
-    import src.resource.placeable.prop as prop_module
-    import src.resource.chat_message as chat_message_module
-    import src.resource.placeable.placeable as placeable_module
-    import src.resource.entity as entity_module
-    import src.resource.time as time_module
-    import src.resource.match_queue as match_queue_module
-    import src.resource.friend_request as friend_request_module
-    import src.resource.player_stats as player_stats_module
-    import src.resource.fuse_task as fuse_task_module
-
-    player_module.attach_resource(app)
-    user_profile_module.attach_resource(app)
-    spell_module.attach_resource(app)
-    island_module.attach_resource(app)
-    builder_minion_module.attach_resource(app)
-    mine_building_module.attach_resource(app)
-    altar_building_module.attach_resource(app)
-    fuse_table_building_module.attach_resource(app)
-    warrior_hut_building_module.attach_resource(app)
-    wall_building_module.attach_resource(app)
-    tower_building_module.attach_resource(app)
-    gems_module.attach_resource(app)
-    blueprint_module.attach_resource(app)
-    task_module.attach_resource(app)
-    upgrade_task_module.attach_resource(app)
-    user_settings_module.attach_resource(app)
-    prop_module.attach_resource(app)
-    chat_message_module.attach_resources(app)
-    placeable_module.attach_resource(app)
-    entity_module.attach_resource(app)
-    time_module.attach_resource(app)
-    match_queue_module.attach_resource(app)
-    friend_request_module.attach_resource(app)
-    player_stats_module.attach_resource(app)
-    fuse_task_module.attach_resource(app)
+    # The modules are imported (and attached) one by one: imports hold the import lock and register the models in the
+    # shared SQLAlchemy registry, and attaching merges into the shared swagger dict, so neither would gain from threads
+    for module_name in _RESOURCE_MODULES:
+        importlib.import_module(module_name).attach_resource(app)
+
+    # Add the swagger documentation of all resources by deep-merging it into the openAPI object, in one pass
+    for spec in _pending_specs:
+        always_merger.merge(openapi_dict, spec)
+    _pending_specs.clear()
 
 
+@lru_cache(maxsize=512)
+def _escape_key(key: str) -> str:
+    """
+    Escape a dictionary key, cached as the keys are (almost always) the same few field names
+    Values are not cached, those are arbitrary user input
+    :param key: The key to escape
+    :return: The escaped key
+    """
+    return str(escape(key))
+
 def clean_dict_input(d: dict) -> dict:
     """
-    Clean the input dictionary by calling escape() on each value
+    Clean the input dictionary by calling escape() on each key and string value
+    Nested dictionaries are cleaned as well, using an explicit stack instead of recursion
+    The input dictionary is not modified, a new (cleaned) dictionary is built instead
     :param d: The input dictionary
     :return: The cleaned dictionary
     """
-    for key, val in d.items():
-        if isinstance(val, str):
-            d[str(escape(key))] = str(escape(val))
-        elif isinstance(val, dict): # recursive call
-            d[escape(key)] = clean_dict_input(val)
+    if not d:  # Nothing to clean (eg an empty request body)
+        return d
+
+    cleaned = dict()
+    stack = [(d, cleaned)]
+    while stack:
+        source, target = stack.pop()
+        for key, val in source.items():
+            key = _escape_key(key)
+            if isinstance(val, str):
+                target[key] = str(escape(val))
+            elif isinstance(val, dict):
+                target[key] = dict()
+                stack.append((val, target[key]))
+            else:
+                target[key] = val
+
+    return cleaned
+
+@lru_cache(maxsize=None)
+def _admin_by_id_stmt() -> Select:
+    """
+    Get the statement that selects only the admin flag of a user profile by id (the 'uid' bind parameter)
+    It's built once (on first use) and then reused, SQLAlchemy caches its compiled form under the same cache key
+    :return: The select statement
+    """
+    from src.model.user_profile import UserProfile # local import to prevent circular imports
+    return select(UserProfile.admin).where(UserProfile.id == bindparam('uid'))
+
+def is_admin() -> bool:
+    """
+    Check if the current user is an admin
+    The admin flag is read from the (verified) JWT, so no query is needed. The claim is set when the token is created
+    and fixed for the token's lifetime (APP_JWT_TOKEN_EXPIRES), so a changed admin flag (or deleted admin) is only
+    picked up by a new token
+    Endpoints that load the user row anyway (eg the user profile endpoints) should check its admin flag instead, which
+    is never stale
+    Tokens issued without the claim fall back to the database, where the result is stored in the request context (g),
+    keyed by the JWT identity, so the admin flag is queried at most once per request (and user)
+    :return: True if the user is an admin, False otherwise (also if the user doesn't exist)
+    """
+    claim = get_jwt().get(ADMIN_CLAIM)
+    if claim is not None:
+        return bool(claim)
 
-    return d
+    userid = get_jwt_identity()
+    cached = g.get('_admin_cache')
+    if cached is not None and cached[0] == userid:
+        return cached[1]
+
+    admin = bool(db.session.execute(_admin_by_id_stmt(), {'uid': userid}).scalar())
+    g._admin_cache = (userid, admin)
+    return admin
 
 def check_admin() -> Optional[Tuple[ErrorSchema, int]]:
     """
     Check if the current user is an admin
     :return: None if the user is an admin, otherwise a 403 response
     """
-    userid = get_jwt_identity()
-    from src.model.user_profile import UserProfile # local import to prevent circular imports
-    user: UserProfile = current_app.db.session.query(UserProfile).get(userid)
-    if not user or not user.admin:
+    if not is_admin():
         return ErrorSchema('Unauthorized access'), 403
     return None
 
@@ -156,7 +224,8 @@ def check_data_ownership(owner_id: int) -> Optional[Tuple[ErrorSchema, int]]:
     :return: None if the user is the owner, otherwise a 403 response
     """
     userid = get_jwt_identity()
-    if owner_id != userid and check_admin():
+    # Owners never need the admin lookup, others are only allowed when they are an admin
+    if owner_id != userid and not is_admin():
         if current_app.config.get('CHECK_DATA_OWNERSHIP', 'true') == 'true':
             return ErrorSchema('Unauthorized access'), 403
         else:
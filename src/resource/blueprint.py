@@ -1,11 +1,14 @@
+from typing import Tuple
+
 import sqlalchemy.exc
 from flask import request, current_app, Flask
 from flask_jwt_extended import jwt_required
 from flask_restful_swagger_3 import Resource, swagger, Api
 from flask import Blueprint as FlaskBlueprint
+from sqlalchemy import select
 
 
-from src.model.blueprint import Blueprint
+from src.model.blueprint import Blueprint, get_blueprint_row
 from src.resource import clean_dict_input, add_swagger, check_admin
 from src.schema import ErrorSchema, SuccessSchema
 from src.swagger_patches import Schema, summary
@@ -50,6 +53,39 @@ class BlueprintSchema(Schema):
             super().__init__(**kwargs)
 
 
+def _complete_schema(schema: BlueprintSchema, blueprint: Blueprint) -> BlueprintSchema:
+    """
+    Fill the (already validated) input schema with the values of the blueprint, so it can be returned as response
+    The blueprint's values come from the database model and need no second validation, unlike BlueprintSchema(blueprint)
+    Call this before committing, as the commit expires the attributes (which would reload the blueprint)
+    :param schema: The schema that validated the request input
+    :param blueprint: The created / updated blueprint
+    :return: The schema, with all properties of the blueprint
+    """
+    schema.update(id=blueprint.id, name=blueprint.name, description=blueprint.description,
+                  cost=blueprint.cost, buildtime=blueprint.buildtime)
+    return schema
+
+
+# The user-facing messages of the blueprint constraints, by constraint name
+_CONSTRAINT_MESSAGES = {
+    'ck_blueprint_cost': 'Cost must be greater than or equal to 0',
+    'ck_blueprint_buildtime': 'Buildtime must be greater than or equal to 0'
+}
+
+
+def _integrity_error_response(e: sqlalchemy.exc.IntegrityError) -> Tuple[ErrorSchema, int]:
+    """
+    Roll back the failed blueprint write and map the violated constraint to a user-facing message
+    The database error itself is not returned, as it contains the constraint name & the failing row
+    :param e: The error raised by the failed write
+    :return: The 400 response
+    """
+    current_app.db.session.rollback()
+    constraint = getattr(getattr(e.orig, 'diag', None), 'constraint_name', None)
+    return ErrorSchema(_CONSTRAINT_MESSAGES.get(constraint, 'Invalid blueprint data')), 400
+
+
 class BlueprintResource(Resource):
     """
     A resource / api endpoint that allows for the retrieval and modification of blueprints
@@ -74,7 +110,8 @@ class BlueprintResource(Resource):
         if id is None:
             return ErrorSchema('No blueprint id given'), 400
 
-        blueprint = Blueprint.query.get(id)
+        # Blueprints only change through this resource (which clears the cache), so serve them from the process cache
+        blueprint = get_blueprint_row(id)
         if blueprint is None:
             return ErrorSchema(f'Unknown blueprint id {id}'), 404
         else:
@@ -103,20 +140,25 @@ class BlueprintResource(Resource):
         data = clean_dict_input(data)
 
         try:
-            BlueprintSchema(**data, _check_requirements=False)
+            schema = BlueprintSchema(**data, _check_requirements=False)
             id = int(data['id'])
 
-            blueprint = Blueprint.query.get(id)
+            blueprint = current_app.db.session.get(Blueprint, id)
             if blueprint is None:
                 return ErrorSchema(f'Unknown blueprint id {id}'), 404
 
             blueprint.update(data)
+            _complete_schema(schema, blueprint)
             current_app.db.session.commit()
+            get_blueprint_row.cache_clear()
 
-            return BlueprintSchema(blueprint), 200
+            return schema, 200
 
         except (ValueError, TypeError) as e:
             return ErrorSchema(str(e)), 400
+        except sqlalchemy.exc.IntegrityError as e:
+            # eg. negative cost or buildtime, rejected by the CHECK constraints
+            return _integrity_error_response(e)
 
 
     @swagger.tags('blueprint')
@@ -140,16 +182,22 @@ class BlueprintResource(Resource):
         data = clean_dict_input(data)
 
         try:
-            BlueprintSchema(**data, _check_requirements=True)
+            schema = BlueprintSchema(**data, _check_requirements=True)
             if 'id' in data:
                 data.pop('id')
 
             blueprint = Blueprint(**data)
             current_app.db.session.add(blueprint)
+            current_app.db.session.flush()  # generate the id
+            _complete_schema(schema, blueprint)
             current_app.db.session.commit()
-            return BlueprintSchema(blueprint), 200
+            get_blueprint_row.cache_clear()
+            return schema, 200
         except (ValueError, TypeError) as e:
             return ErrorSchema(str(e)), 400
+        except sqlalchemy.exc.IntegrityError as e:
+            # eg. negative cost or buildtime, rejected by the CHECK constraints
+            return _integrity_error_response(e)
 
 
     @swagger.tags('blueprint')
@@ -177,13 +225,14 @@ class BlueprintResource(Resource):
         if id is None:
             return ErrorSchema('No blueprint id given'), 400
 
-        blueprint = Blueprint.query.get(id)
+        blueprint = current_app.db.session.get(Blueprint, id)
         if blueprint is None:
             return ErrorSchema(f'Unknown blueprint id {id}'), 404
         else:
             try:
                 current_app.db.session.delete(blueprint)
                 current_app.db.session.commit()
+                get_blueprint_row.cache_clear()
                 return SuccessSchema(), 200
             except sqlalchemy.exc.IntegrityError as e:
                 if 'ForeignKeyViolation' in e.args[0]:
@@ -206,8 +255,9 @@ class BlueprintListResource(Resource):
         Get all blueprints
         :return:
         """
-        blueprints = Blueprint.query.all()
-        return [BlueprintSchema(blueprint) for blueprint in blueprints], 200
+        # Read-only list, so select the plain columns and serialize the rows directly (no ORM objects, no schema checks)
+        rows = current_app.db.session.execute(select(*Blueprint.__table__.columns))
+        return [row._asdict() for row in rows], 200
 
 
 def attach_resource(app: Flask) -> None:
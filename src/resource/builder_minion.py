@@ -1,9 +1,13 @@
 from flask import request, current_app, Flask, Blueprint
 from flask_jwt_extended import jwt_required
 from flask_restful_swagger_3 import swagger, Api
+from sqlalchemy import select, exists, bindparam
+from sqlalchemy.orm import joinedload
 
 from src.model.island import Island
 from src.model.builder_minion import BuilderMinion
+from src.model.placeable.building import Building
+from src.model.upgrade_task import BuildingUpgradeTask
 from src.resource import clean_dict_input, add_swagger, check_data_ownership
 from src.resource.entity import EntitySchema, EntityResource
 from src.schema import ErrorSchema, SuccessSchema
@@ -37,6 +41,40 @@ class BuilderMinionSchema(EntitySchema):
             super().__init__(**kwargs)
 
 
+# Loader options for the (builds_on) task & its building that BuilderMinionSchema serializes, joined in the same query
+BUILDER_MINION_SCHEMA_LOAD_OPTIONS = [
+    joinedload(BuilderMinion.builds_on).joinedload(BuildingUpgradeTask.working_building)
+]
+
+
+# Select a building (the 'building_id' bind parameter) together with its task
+_BUILDING_WITH_TASK_STMT = (select(Building)
+                            .where(Building.placeable_id == bindparam('building_id'))
+                            .options(joinedload(Building.task)))
+
+# Select a builder minion (the 'minion_id' bind parameter), together with the building (the 'builds_on_id' bind
+# parameter, None if it doesn't exist) and its task, and whether the island (the 'island_id' bind parameter) exists
+_MINION_PUT_STMT = (select(BuilderMinion, Building, exists().where(Island.owner_id == bindparam('island_id')))
+                    .outerjoin(Building, Building.placeable_id == bindparam('builds_on_id'))
+                    .where(BuilderMinion.entity_id == bindparam('minion_id'))
+                    .options(joinedload(Building.task)))
+
+
+def _builds_on_task(building_id: int, building: Building) -> BuildingUpgradeTask:
+    """
+    Parse the integer builds_on input to the actual task, the upgrade task of the building
+    :param building_id: The builds_on input (the id of the building)
+    :param building: The building with that id (with its task loaded), or None if it doesn't exist
+    :return: The upgrade task of the building
+    :raises ValueError: If the building doesn't exist or is not being upgraded
+    """
+    if building is None:
+        raise ValueError(f"Building with id {building_id} not found")
+    if not isinstance(building.task, BuildingUpgradeTask):
+        raise ValueError(f"Building with id {building_id} is not being upgraded")
+    return building.task
+
+
 class BuilderMinionResource(EntityResource):
     """
     A resource/api endpoint that allows for the retrieval and modification of builder minions
@@ -59,7 +97,7 @@ class BuilderMinionResource(EntityResource):
         if id is None:
             return ErrorSchema('No id given'), 400
 
-        builder_minion = BuilderMinion.query.get(id)
+        builder_minion = current_app.db.session.get(BuilderMinion, id, options=BUILDER_MINION_SCHEMA_LOAD_OPTIONS)
         if builder_minion is None:
             return ErrorSchema(f'Builder minion {id} not found'), 404
 
@@ -95,16 +133,11 @@ class BuilderMinionResource(EntityResource):
 
         # parse the integer building input to the actual task
         if 'builds_on' in data:
-            from src.model.placeable.building import Building
-            building = Building.query.get(data['builds_on'])
-            if building is None:
-                return ErrorSchema(f"Building with id {data['builds_on']} not found"), 400
-
-            from src.model.upgrade_task import BuildingUpgradeTask
-            if not isinstance(building.task, BuildingUpgradeTask):
-                return ErrorSchema(f"Building with id {data['builds_on']} is not being upgraded"), 400
-
-            data['builds_on'] = building.task # set the task
+            building = current_app.db.session.execute(_BUILDING_WITH_TASK_STMT, {'building_id': data['builds_on']}).scalar_one_or_none()
+            try:
+                data['builds_on'] = _builds_on_task(data['builds_on'], building)
+            except ValueError as e:
+                return ErrorSchema(str(e)), 400
 
         if 'type' in data:
             # Remove the type field as it's not needed, it's always 'builder_minion' since we're in the builder_minion endpoint
@@ -116,7 +149,7 @@ class BuilderMinionResource(EntityResource):
         r = check_data_ownership(builder_minion.island_id)  # island_id == owner_id
         if r: return r
 
-        island = Island.query.get(builder_minion.island_id)
+        island = current_app.db.session.get(Island, builder_minion.island_id)
         if island is None:
             return ErrorSchema(f"Island with id {builder_minion.island_id} not found"), 400
 
@@ -148,27 +181,23 @@ class BuilderMinionResource(EntityResource):
             id = int(data['entity_id'])
 
 
-            minion = BuilderMinion.query.get(id)
-            if minion is None:
+            # Fetch the minion, the building it should work on and whether the new island exists in one round-trip
+            # A missing builds_on / island_id binds NULL, which matches no building and no island
+            row = current_app.db.session.execute(_MINION_PUT_STMT, {
+                'minion_id': id,
+                'builds_on_id': data.get('builds_on'),
+                'island_id': int(data['island_id']) if 'island_id' in data else None
+            }).one_or_none()
+            if row is None:
                 return ErrorSchema(f"Builder minion with id {id} not found"), 404
+            minion, building, island_exists = row
 
             # parse the integer building input to the actual task
             if 'builds_on' in data:
-                from src.model.placeable.building import Building
-                building = Building.query.get(data['builds_on'])
-                if building is None:
-                    return ErrorSchema(f"Building with id {data['builds_on']} not found"), 400
-
-                from src.model.upgrade_task import BuildingUpgradeTask
-                if not isinstance(building.task, BuildingUpgradeTask):
-                    return ErrorSchema(f"Building with id {data['builds_on']} is not being upgraded"), 400
-
-                data['builds_on'] = building.task  # set the task
+                data['builds_on'] = _builds_on_task(data['builds_on'], building)
 
-            if 'island_id' in data:
-                island = Island.query.get(int(data['island_id']))
-                if island is None:
-                    return ErrorSchema(f"Island with id {data['island_id']} not found"), 400
+            if 'island_id' in data and not island_exists:
+                return ErrorSchema(f"Island with id {data['island_id']} not found"), 400
 
             r = check_data_ownership(minion.island_id)  # island_id == owner_id
             if r: return r
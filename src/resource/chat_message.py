@@ -1,4 +1,4 @@
-from flask import request, Flask, Blueprint
+from flask import request, current_app, Flask, Blueprint
 from flask_jwt_extended import jwt_required
 from flask_restful_swagger_3 import Resource, swagger, Api
 
@@ -41,7 +41,7 @@ class ChatMessageSchema(Schema):
                              id=chat_message.id,
                              user_id=chat_message.user_id,
                              message=chat_message.message,
-                             created_at=str(chat_message.created_at).replace(' ', 'T'),
+                             created_at=chat_message.created_at,  # orjson formats datetimes as RFC 3339
                              **kwargs)
         else:
             super().__init__(**kwargs)
@@ -70,13 +70,18 @@ class ChatMessageResource(Resource):
         if id is None:
             return ErrorSchema('Chat id missing'), 400
 
-        chat_message = ChatMessage.query.get(id)
+        chat_message = current_app.db.session.get(ChatMessage, id)
         if chat_message is None:
             return ErrorSchema('Chat message not found'), 404
 
         return ChatMessageSchema(chat_message), 200
 
 
+# The default & maximum page size of the chat message list
+CHAT_PAGE_DEFAULT = 50
+CHAT_PAGE_MAX = 500
+
+
 class ChatMessageListResource(Resource):
     """
     Resource for listing of chat messages, eg all chat messages of a user
@@ -85,28 +90,41 @@ class ChatMessageListResource(Resource):
     @swagger.tags('chat')
     @summary('List chat messages of a player')
     @swagger.parameter(name='user_id', description='The unique identifier of the user profile', required=True, _in='query', schema={'type': 'integer'})
+    @swagger.parameter(name='limit', description=f'The maximum amount of messages to return (default {CHAT_PAGE_DEFAULT}, max {CHAT_PAGE_MAX})', required=False, _in='query', schema={'type': 'integer'})
+    @swagger.parameter(name='before_id', description='Only return messages with an id lower than this one, to fetch the next page', required=False, _in='query', schema={'type': 'integer'})
     @swagger.response(200, 'Success', schema=ChatMessageSchema)
     @swagger.response(404, 'No user and/or chat messages found', schema=ErrorSchema)
     @swagger.response(400, 'Invalid request', schema=ErrorSchema)
     @jwt_required()
     def get(self):
         """
-        List all chat messages of a player
+        List the chat messages of a player, newest first
+        The messages are paginated: pass the id of the last (oldest) received message as before_id to get the next page
         :return: The chat messages
         """
         user_id = request.args.get('user_id', type=int)
         if user_id is None:
             return ErrorSchema('User id missing'), 400
 
-        chat_messages = ChatMessage.query.filter_by(user_id=user_id).all()
-        if not chat_messages:
+        limit = request.args.get('limit', CHAT_PAGE_DEFAULT, type=int)
+        if limit < 1:
+            return ErrorSchema('Limit must be at least 1'), 400
+        limit = min(limit, CHAT_PAGE_MAX)
+        before_id = request.args.get('before_id', type=int)
+
+        query = ChatMessage.query.filter(ChatMessage.user_id == user_id)
+        if before_id is not None:
+            query = query.filter(ChatMessage.id < before_id)
+        chat_messages = query.order_by(ChatMessage.id.desc()).limit(limit).all()
+
+        if not chat_messages and before_id is None:
             return ErrorSchema('No user and/or chat messages found'), 404
 
         return [ChatMessageSchema(chat_message) for chat_message in chat_messages], 200
 
 
 
-def attach_resources(app: Flask):
+def attach_resource(app: Flask):
     """
     Attach the ChatMessageListResource and ChatMessageResource (API endpoint + Swagger docs) to the given Flask app
     :param app: The app to create the endpoint for
@@ -91,7 +91,7 @@ class EntityResource(Resource):
         if id is None:
             return ErrorSchema('No entity id found'), 400
 
-        entity = Entity.query.get(id)
+        entity = current_app.db.session.get(Entity, id)
         if entity is None:
             return ErrorSchema(f'Entity {id} not found'), 404
 
@@ -176,9 +176,8 @@ class FriendRequestResource(Resource):
             if 'status' in data:
                 if data['status'] == 'accepted':
                     logging.debug(f"Accepting friend request {friend_request.id} ({friend_request.sender_id} -> {friend_request.receiver_id})")
-                    # Add the sender and receiver as friends
-                    friend_request.sender.friends.append(friend_request.receiver)
-                    friend_request.receiver.friends.append(friend_request.sender)
+                    # Add the sender and receiver as friends (both directions, keeping their friends_count in sync)
+                    friend_request.sender.add_friend(friend_request.receiver_id)
                     current_app.db.session.delete(friend_request)
                     current_app.db.session.commit()
                 elif data['status'] == 'rejected':
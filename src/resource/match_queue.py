@@ -3,8 +3,8 @@ import logging
 from flask import request
 
 from flask import current_app
+from sqlalchemy import delete, select, func
 
-from src.model.player_entity import PlayerEntity
 from src.model.match_queue import MatchQueueEntry
 from src.schema import ErrorSchema, SuccessSchema
 
@@ -98,19 +98,23 @@ class MatchQueueResource(Resource):
             # Check for opponents
             diff: int = 1 if 'APP_MATCHMAKING_LEVEL_RANGE' not in current_app.config else int(current_app.config.get('APP_MATCHMAKING_LEVEL_RANGE'))
 
-            entry: Optional[MatchQueueEntry] = MatchQueueEntry.query\
-                        .join(Player) \
-                        .join(PlayerEntity) \
-                        .filter(MatchQueueEntry.player_id != target_user_id) \
-                        .filter(target_player.entity.level - diff <= PlayerEntity.level)\
-                        .filter(PlayerEntity.level <= target_player.entity.level + diff) \
-                        .first()
-
-            if entry is not None:
-                opponent: Player = entry.player
-                # Remove the entry (not player!) from the queue
-                current_app.db.session.delete(entry)
+            # Find the closest-level opponent and remove its entry (not player!) from the queue in a single statement
+            # SKIP LOCKED makes sure two concurrent requests can never claim the same opponent
+            level: int = target_player.entity.level
+            closest_opponent = select(MatchQueueEntry.player_id) \
+                        .where(MatchQueueEntry.player_id != target_user_id) \
+                        .where(MatchQueueEntry.level.between(level - diff, level + diff)) \
+                        .order_by(func.abs(MatchQueueEntry.level - level)) \
+                        .limit(1) \
+                        .with_for_update(skip_locked=True) \
+                        .scalar_subquery()
+            opponent_id: Optional[int] = current_app.db.session.execute(
+                delete(MatchQueueEntry).where(MatchQueueEntry.player_id == closest_opponent).returning(MatchQueueEntry.player_id)
+            ).scalar_one_or_none()
+
+            if opponent_id is not None:
                 current_app.db.session.commit()
+                opponent: Player = current_app.db.session.get(Player, opponent_id)
 
                 # Send a message to the players through the websocket
                 current_app.socketio.forwarding_namespace.on_match_found(target_user_id, opponent.user_profile_id)
@@ -120,7 +124,7 @@ class MatchQueueResource(Resource):
 
             else:
                 # Add the player to the queue
-                entry = MatchQueueEntry(player_id=target_user_id)
+                entry = MatchQueueEntry(player_id=target_user_id, level=target_player.entity.level)
                 current_app.db.session.add(entry)
                 current_app.db.session.commit()
                 logging.getLogger(__name__).info(f"Player {target_user_id} added to the queue")
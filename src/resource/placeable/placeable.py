@@ -7,6 +7,7 @@ from src.resource import add_swagger, check_data_ownership
 from src.schema import ErrorSchema, SuccessSchema
 from src.resource.blueprint import BlueprintSchema
 from src.model.placeable.placeable import Placeable
+from src.model.blueprint import get_blueprint_row
 from src.swagger_patches import Schema, summary
 
 
@@ -62,7 +63,7 @@ class PlaceableSchema(Schema):
                              x=placeable.xpos,
                              z=placeable.zpos,
                              type=placeable.type,
-                             blueprint=BlueprintSchema(placeable.blueprint),
+                             blueprint=BlueprintSchema(get_blueprint_row(placeable.blueprint_id)),
                              rotation=placeable.rotation,
                              task=self._resolve_task_schema_for_type(placeable.task) if placeable.task is not None else None,
                              **kwargs)
@@ -5,6 +5,7 @@ from flask import current_app, Blueprint, request, Flask
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_restful_swagger_3 import Resource, swagger, Api
 from markupsafe import escape
+from sqlalchemy.orm import selectinload, joinedload
 
 from src.model.player_entity import PlayerEntity
 from src.resource.entity import EntitySchema
@@ -120,7 +121,11 @@ class PlayerSchema(Schema):
             'format': 'date-time',
             'description': 'The last logout time of the player'
         },
-        'friends': IntArraySchema
+        'friends': IntArraySchema,
+        'friends_count': {
+            'type': 'integer',
+            'description': 'The amount of friends of the player (read-only)'
+        }
     }
 
     required = []  # nothing is required, but not giving anything is just doing nothing
@@ -136,6 +141,7 @@ class PlayerSchema(Schema):
                              entity=PlayerEntitySchema(player=player.entity),
                              username=player.user_profile.username,
                              friends=[friend.user_profile_id for friend in player.friends],
+                             friends_count=player.friends_count,
                              **kwargs)
         else:  # schema -> player
             super().__init__(**kwargs)
@@ -143,6 +149,16 @@ class PlayerSchema(Schema):
 
 
 
+# Loader options for everything PlayerSchema serializes, so a (list of) player(s) is loaded in a fixed amount of queries
+PLAYER_SCHEMA_LOAD_OPTIONS = [
+    selectinload(Player.entity),
+    selectinload(Player.spells_association),
+    selectinload(Player.gems),
+    selectinload(Player.friends),
+    joinedload(Player.user_profile)
+]
+
+
 class PlayerResource(Resource):
     """
     A Player resource is a resource/api endpoint that allows for the retrieval and modification of player profiles
@@ -166,7 +182,7 @@ class PlayerResource(Resource):
 
         target_user_id = int(escape(request.args.get('id', current_user_id)))
 
-        player: Optional[Player] = Player.query.get(target_user_id)
+        player: Optional[Player] = current_app.db.session.get(Player, target_user_id, options=PLAYER_SCHEMA_LOAD_OPTIONS)
 
         # Check if the target player exists
         if player is None:
@@ -211,7 +227,7 @@ class PlayerResource(Resource):
             PlayerSchema(**data)  # Validate the input
 
             # Get the player profile
-            player: Optional[Player] = Player.query.get(user_id)
+            player: Optional[Player] = current_app.db.session.get(Player, user_id, options=PLAYER_SCHEMA_LOAD_OPTIONS)
 
             # Check if the target player exists
             if player is None:  # This should never happen, as the player is guaranteed to exist by the JWT
@@ -252,7 +268,7 @@ class PlayerListResource(Resource):
         Get all player profiles
         :return: The player profiles in JSON format
         """
-        players = Player.query.all()
+        players = Player.query.options(*PLAYER_SCHEMA_LOAD_OPTIONS).all()
         return [PlayerSchema(player) for player in players], 200
 
 
@@ -110,7 +110,7 @@ class PlayerStatsResource(Resource):
         if not player_id:
             return ErrorSchema("Invalid player_id"), 400
 
-        player_stats = PlayerStats.query.get(player_id)
+        player_stats = PlayerStats.fetch_raw(current_app.db.session, player_id)
         if player_stats is None:
             return ErrorSchema("Player not found"), 404
         return PlayerStatsSchema(player_stats), 200
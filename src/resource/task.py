@@ -258,7 +258,8 @@ class TaskListResource(Resource):
             is_over: bool = request.args.get('is_over').lower() == "true"
             query = query.filter(Task.endtime < current_app.db.func.now() if is_over else Task.endtime >= current_app.db.func.now())
 
-        tasks = query.all()
+        # Ordered by endtime, which the (island_id, endtime) index returns without a separate sort
+        tasks = query.order_by(Task.endtime).all()
         return [TaskSchema(task) for task in tasks], 200
 
 
@@ -183,6 +183,8 @@ class UserProfileResource(Resource):
             return ErrorSchema(f"User {target_user_id} not found"), 404
         else:
             logging.getLogger(__name__).info(f'Annihilating user {target_user_id} from existence... (deleting user profile)')
+            if target_user.player is not None:
+                target_user.player.release_friends_count()
             current_app.db.session.delete(target_user)
             current_app.db.session.commit()
             return SuccessSchema(f"User {target_user_id} has been deleted"), 200
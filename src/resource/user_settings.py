@@ -1,8 +1,9 @@
 from flask import request, Flask, Blueprint, current_app
 from flask_jwt_extended import jwt_required
 from flask_restful_swagger_3 import Resource, swagger, Api
+from sqlalchemy.orm import undefer_group
 
-from src.model.user_settings import UserSettings
+from src.model.user_settings import UserSettings, KEYBINDS_GROUP
 from src.resource import clean_dict_input, add_swagger, check_data_ownership
 from src.schema import ErrorSchema
 from src.swagger_patches import Schema, summary
@@ -202,7 +203,8 @@ class UserSettingsResource(Resource):
         if id is None:
             return ErrorSchema('Player id absent'), 400
 
-        user_settings = UserSettings.query.get(id)
+        # The schema contains all settings, so load the (deferred) keybinds in the same query
+        user_settings = current_app.db.session.get(UserSettings, id, options=[undefer_group(KEYBINDS_GROUP)])
         if user_settings is None:
             return ErrorSchema('The player does not exist'), 404
 
@@ -235,7 +237,7 @@ class UserSettingsResource(Resource):
             if id is None:
                 return ErrorSchema('Player id absent'), 400
 
-            user_settings = UserSettings.query.get(id)
+            user_settings = current_app.db.session.get(UserSettings, id, options=[undefer_group(KEYBINDS_GROUP)])
             if user_settings is None:
                 return ErrorSchema('The player does not exist'), 404
 
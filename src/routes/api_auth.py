@@ -18,7 +18,6 @@ from src.service.auth_service import AUTH_SERVICE
 blueprint = Blueprint('api_auth', __name__)
 
 # Utliity variables
-db = current_app.db
 _log = logging.getLogger(__name__)
 
 @blueprint.route("/register", methods=['POST'])
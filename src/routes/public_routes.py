@@ -5,7 +5,6 @@ from flask_jwt_extended.exceptions import NoAuthorizationError
 from jwt import ExpiredSignatureError
 
 blueprint = Blueprint('public_routes', __name__)
-db = current_app.db
 
 @blueprint.route("/")
 def index():
@@ -3,8 +3,8 @@ from typing import Optional
 
 from flask import current_app
 from flask_jwt_extended import create_access_token
-from flask_sqlalchemy import SQLAlchemy
 
+from src.model import db
 from src.model.player_stats import PlayerStats
 from src.model.player import PlayerSpellAssociation
 from src.model.player_entity import PlayerEntity
@@ -16,7 +16,9 @@ from src.model.island import Island
 from src.model.credentials import Credentials, PasswordCredentials, OAuth2Credentials
 from src.model.user_settings import UserSettings
 
-db: SQLAlchemy = current_app.db
+# The (additional) JWT claim with the admin flag of the user, set when the token is created (see create_jwt)
+# and read by is_admin() in src/resource
+ADMIN_CLAIM = 'adm'
 
 class AuthService:
     """
@@ -72,13 +74,13 @@ class AuthService:
     def create_jwt(self, user: 'UserProfile') -> str:
         """
         Generate a JWT token for the user.
-        Tokens are identified by the user_id
+        Tokens are identified by the user_id, and carry the admin flag of the user (ADMIN_CLAIM)
         ONLY use this method after successful authentication
         :param user: The user to generate the token for
         :return: The JWT token
         """
         self._log.debug(f'Generating JWT token for user {user.id}')
-        token = create_access_token(identity=user.id)
+        token = create_access_token(identity=user.id, additional_claims={ADMIN_CLAIM: user.admin})
         return token
 
 
@@ -176,7 +178,7 @@ class AuthService:
         current_app.db.session.commit()
 
         # The player can initially only build the altar
-        player.update({'blueprints': [BlueprintType.ALTAR.value]})
+        player.update({'blueprints': [BlueprintType.ALTAR]})
 
         # Update player spells, it initially has the build spell
         from src.model.spell import Spell
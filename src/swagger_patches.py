@@ -2,7 +2,7 @@
 This file patches all the stupid and broken stuff in the swagger module
 """
 
-from flask_restful_swagger_3 import Schema, REGISTRY_SCHEMA
+from flask_restful_swagger_3 import Schema, REGISTRY_SCHEMA, Resource
 
 
 def check_type(self, type_, key, value):
@@ -118,6 +118,10 @@ Schema.__doc__ = """
     A schema that represents the model in JSON format.
     """
 
+# Our resources don't keep any state on the instance, so let Flask create each resource once (when the endpoint is
+# registered) instead of once per request. Should a resource ever need per-request state, store it on flask.g instead
+Resource.init_every_request = False
+
 
 def summary(summary: str):
     """
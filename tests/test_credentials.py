@@ -0,0 +1,39 @@
+import importlib
+import pkgutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+
+import src.model
+from src.model.credentials import PasswordCredentials
+
+
+@pytest.fixture
+def app():
+    """
+    A minimal app with the bcrypt thread pool (see setup() in app.py) and a low bcrypt cost, to keep the tests fast
+    All models are imported (as the app does through its resources), so the mappers can resolve their relationships
+    """
+    for module in pkgutil.walk_packages(src.model.__path__, 'src.model.'):
+        importlib.import_module(module.name)
+
+    app = Flask(__name__)
+    app.config['APP_BCRYPT_COST'] = 4
+    app.extensions['bcrypt_pool'] = ThreadPoolExecutor(max_workers=2)
+    with app.app_context():
+        yield app
+    app.extensions['bcrypt_pool'].shutdown()
+
+
+def test_create_from_password_authenticates(app):
+    credentials = PasswordCredentials.create_from_password('correct horse')
+    assert credentials.authenticate({'password': 'correct horse'})
+    assert not credentials.authenticate({'password': 'wrong horse'})
+
+
+def test_change_password_authenticates(app):
+    credentials = PasswordCredentials.create_from_password('old password')
+    credentials.change_password('new password')
+    assert credentials.authenticate({'password': 'new password'})
+    assert not credentials.authenticate({'password': 'old password'})